@@ -0,0 +1,248 @@
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from typing import List, Optional, Dict, Iterator
+
+import numpy as np
+
+from NewScheduler import Scheduler, Person, AbstractTask, Day, Preference, DateTimeClass, ScheduleResult
+
+# Capabilities every Person is given on construction, left out of the block and added back when rebuilt
+ALWAYS_PERFORMABLE = ('Dev', 'HalfDev', 'Vacation')
+
+
+class SharedRoster:
+    """
+    People compiled once into a read-only multiprocessing.shared_memory block that other processes attach to by
+    name instead of receiving pickled Person objects. The block is a JSON header (names, task definitions, preference
+    targets and where each array sits) followed by NumPy arrays: weight_per_day, a people x performable task
+    capability matrix and one table each for preferences and avoid preferences, rows in each person's list order.
+    people() builds fresh Person objects from views of the arrays, so every solve gets people of its own to mutate.
+    Rebuilt people are plain Persons with the same capabilities, whatever class they were compiled from.
+    """
+    shm: shared_memory.SharedMemory
+    names: List[str]
+    arrays: Dict[str, np.ndarray]
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        header_size = int.from_bytes(bytes(shm.buf[:8]), 'little')
+        header = json.loads(bytes(shm.buf[8:8 + header_size]))
+        self.names = header['names']
+        self.tasks = [tuple(task) for task in header['tasks']]
+        self.targets = header['targets']
+        start = self.data_start(header_size)
+        self.arrays = {key: np.ndarray(tuple(shape), dtype=dtype, buffer=shm.buf, offset=start + offset)
+                       for key, (dtype, shape, offset) in header['arrays'].items()}
+        for array in self.arrays.values():
+            array.flags.writeable = False
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @staticmethod
+    def data_start(header_size: int) -> int:
+        """The arrays follow the length, then the header, at the next 8-byte boundary."""
+        return (8 + header_size + 7) // 8 * 8
+
+    @classmethod
+    def create(cls, people: List[Person]) -> 'SharedRoster':
+        tasks: Dict[tuple, int] = {}
+        for person in people:
+            for task in person.performable_tasks:
+                if task.name not in ALWAYS_PERFORMABLE:
+                    tasks.setdefault((task.name, task.location), len(tasks))
+        capable = np.zeros((len(people), len(tasks)), dtype=bool)
+        targets: Dict[str, int] = {}
+        tables = {'preferences': ([], []), 'avoid_preferences': ([], [])}
+        for i, person in enumerate(people):
+            for task in person.performable_tasks:
+                if task.name not in ALWAYS_PERFORMABLE:
+                    capable[i, tasks[(task.name, task.location)]] = True
+            for key, preferences in (('preferences', person.preferences),
+                                     ('avoid_preferences', person.avoid_preferences)):
+                rows, weights = tables[key]
+                for preference in preferences:
+                    rows.append((i, preference.day.ordinal,
+                                 targets.setdefault(preference.task_or_location, len(targets))))
+                    weights.append(preference.weight)
+        arrays = {
+            'weight_per_day': np.array([person.weight_per_day for person in people], dtype=float),
+            'capable': capable,
+        }
+        for key, (rows, weights) in tables.items():
+            arrays[key] = np.array(rows, dtype=np.int64).reshape(len(rows), 3)
+            arrays[f'{key}_weight'] = np.array(weights, dtype=float)
+
+        # Each array 8-byte aligned, offsets counted from the start of the data
+        layout = {}
+        size = 0
+        for key, array in arrays.items():
+            layout[key] = (array.dtype.str, array.shape, size)
+            size += (array.nbytes + 7) // 8 * 8
+        encoded = json.dumps({'names': [person.name for person in people], 'tasks': list(tasks),
+                              'targets': list(targets), 'arrays': layout}).encode()
+        start = cls.data_start(len(encoded))
+
+        shm = shared_memory.SharedMemory(create=True, size=start + size)
+        shm.buf[:8] = len(encoded).to_bytes(8, 'little')
+        shm.buf[8:8 + len(encoded)] = encoded
+        for key, array in arrays.items():
+            np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf, offset=start + layout[key][2])[...] = array
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> 'SharedRoster':
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    def people(self, names: Optional[List[str]] = None,
+               weight_per_day: Optional[Dict[str, float]] = None) -> List[Person]:
+        """
+        Fresh Person objects for the named people (everyone by default, in roster order), weight_per_day
+        overriding theirs by name.
+        """
+        weight_per_day = weight_per_day or {}
+        index = {name: i for i, name in enumerate(self.names)}
+        rows = range(len(self.names)) if names is None else [index[name] for name in names]
+        preferences = {key: self._preferences(key) for key in ('preferences', 'avoid_preferences')}
+        capable = self.arrays['capable']
+        weights = self.arrays['weight_per_day']
+        people = []
+        for i in rows:
+            name = self.names[i]
+            performable_tasks = [AbstractTask(self.tasks[j][0], 0.0, location=self.tasks[j][1])
+                                 for j in np.flatnonzero(capable[i])]
+            people.append(Person(name, weight_per_day.get(name, float(weights[i])),
+                                 preferences=preferences['preferences'].get(i, []),
+                                 avoid_preferences=preferences['avoid_preferences'].get(i, []),
+                                 performable_tasks=performable_tasks))
+        return people
+
+    def _preferences(self, key: str) -> Dict[int, List[Preference]]:
+        dates: Dict[int, DateTimeClass] = {}
+        by_person: Dict[int, List[Preference]] = {}
+        rows = self.arrays[key].tolist()
+        for (person, ordinal, target), weight in zip(rows, self.arrays[f'{key}_weight'].tolist()):
+            day = dates.get(ordinal)
+            if day is None:
+                day = dates[ordinal] = DateTimeClass.from_ordinal(ordinal)
+            by_person.setdefault(person, []).append(Preference(day, self.targets[target], weight=weight))
+        return by_person
+
+    def close(self):
+        """Detach; the owner also frees the block."""
+        self.arrays = {}
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class Scenario:
+    """
+    One problem to solve over the shared roster: its days, and optionally a staffing plan (the names of the people
+    who take part, in order, and weight_per_day overrides by name).
+    """
+    name: str
+    days: List[Day]
+    people: Optional[List[str]]
+    weight_per_day: Dict[str, float]
+    relaxation: str
+
+    def __init__(self, name: str, days: List[Day], people: Optional[List[str]] = None,
+                 weight_per_day: Optional[Dict[str, float]] = None, relaxation: str = 'restart'):
+        self.name = name
+        self.days = days
+        self.people = people
+        self.weight_per_day = weight_per_day if weight_per_day else {}
+        self.relaxation = relaxation
+
+    def __repr__(self):
+        return f"Scenario(name={self.name}, days={len(self.days)})"
+
+
+class ScenarioResult:
+    index: int
+    name: str
+    result: ScheduleResult
+    request_weight: float
+    unassigned: int
+    seconds: float
+
+    def __init__(self, index: int, name: str, result: ScheduleResult, request_weight: float, seconds: float):
+        self.index = index
+        self.name = name
+        self.result = result
+        self.request_weight = request_weight
+        self.unassigned = len(result.unassigned().ordinal)
+        self.seconds = seconds
+
+    def __repr__(self):
+        return (f"ScenarioResult(name={self.name}, request_weight={self.request_weight}, "
+                f"unassigned={self.unassigned}, seconds={self.seconds:.3f})")
+
+
+# The roster every worker process solves against, attached by attach_roster
+_roster: Optional[SharedRoster] = None
+
+
+def attach_roster(name: str):
+    global _roster
+    _roster = SharedRoster.attach(name)
+
+
+def solve_scenario(index: int, scenario: Scenario, roster: Optional[SharedRoster] = None) -> ScenarioResult:
+    start = time.perf_counter()
+    roster = _roster if roster is None else roster
+    scheduler = Scheduler(relaxation=scenario.relaxation)
+    for person in roster.people(scenario.people, scenario.weight_per_day):
+        scheduler.add_person(person)
+    for day in scenario.days:
+        scheduler.add_day(day)
+    scheduler.create_schedule()
+    return ScenarioResult(index, scenario.name, scheduler.get_result(), scheduler.request_weight,
+                          time.perf_counter() - start)
+
+
+class BatchScheduler:
+    """
+    Solves many scenarios over one roster in parallel. The roster is compiled into a SharedRoster once and every
+    worker attaches to it when it starts, so a scenario only ships its own days and staffing plan to the worker and
+    only a ScheduleResult comes back. Use as a context manager, or call close() to stop the workers and free the
+    block.
+    """
+    roster: SharedRoster
+
+    def __init__(self, people: List[Person], max_workers: Optional[int] = None):
+        self.roster = SharedRoster.create(people)
+        self.pool = ProcessPoolExecutor(max_workers=max_workers, initializer=attach_roster,
+                                        initargs=(self.roster.name,))
+
+    def solve(self, scenarios: List[Scenario]) -> Iterator[ScenarioResult]:
+        """Yield each scenario's result as soon as it is solved; ScenarioResult.index gives its place in scenarios."""
+        futures = [self.pool.submit(solve_scenario, index, scenario) for index, scenario in enumerate(scenarios)]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def solve_all(self, scenarios: List[Scenario]) -> List[ScenarioResult]:
+        """Every scenario's result, in the order of scenarios."""
+        results = [None] * len(scenarios)
+        for result in self.solve(scenarios):
+            results[result.index] = result
+        return results
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+        self.roster.close()
+
+    def __enter__(self) -> 'BatchScheduler':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
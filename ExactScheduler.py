@@ -0,0 +1,150 @@
+from typing import List, Optional, Dict, Set, Callable
+
+from NewScheduler import Scheduler, SchedulerStats, Person, Task, Day, DateTimeClass, tasks_conflict
+
+
+def count_bits(domain: int) -> int:
+    return bin(domain).count("1")
+
+
+class DaySearch:
+    """
+    Complete search for one day's open tasks. Each task's domain is a bitset over the scheduler's people, so
+    forward checking is an AND-NOT on the domains of the conflicting tasks. When a task runs out of people the
+    search jumps straight back to the most recent assignment that took part in the conflict (FC-CBJ) instead of
+    retrying the assignments in between. out_of_time, if given, is polled at every node; once it is True the search
+    unwinds and solve returns None with timed_out set.
+    """
+    tasks: List[Task]
+    people: List[Person]
+    domains: List[int]
+    assignment: List[Optional[int]]
+    timed_out: bool
+
+    def __init__(self, tasks: List[Task], people: List[Person], domains: List[int],
+                 out_of_time: Optional[Callable[[], bool]] = None):
+        self.tasks = tasks
+        self.people = people
+        self.domains = list(domains)
+        self.assignment = [None] * len(tasks)
+        # Which assigned tasks removed people from each task's domain
+        self.past_fc: List[Set[int]] = [set() for _ in tasks]
+        self.conflicts = [[i != j and tasks_conflict(task, other) for j, other in enumerate(tasks)]
+                          for i, task in enumerate(tasks)]
+        # Weight each person picks up during the search, used to keep the load balanced
+        self.load = [0.0] * len(people)
+        self.nodes = 0
+        self.out_of_time = out_of_time
+        self.timed_out = False
+
+    def solve(self) -> Optional[Dict[Task, Person]]:
+        if self.search() is not None:
+            return None
+        return {task: self.people[person] for task, person in zip(self.tasks, self.assignment)}
+
+    def capacity(self, person: int) -> float:
+        p = self.people[person]
+        current_weight = p.current_weight + self.load[person]
+        return p.max_weight - current_weight if current_weight != 0 else 999
+
+    def values(self, variable: int) -> List[int]:
+        """People in the task's domain; whoever holds a task requiring it comes first, then most capacity first."""
+        task = self.tasks[variable]
+        domain = self.domains[variable]
+        people = [i for i in range(len(self.people)) if domain >> i & 1]
+        partners = set()
+        for other, person in enumerate(self.assignment):
+            if person is not None and task.name in self.tasks[other].requires:
+                partners.add(person)
+        for person in people:
+            if any(task.name in t.requires for t in self.people[person].tasks_on(task.date)):
+                partners.add(person)
+        return sorted(people, key=lambda i: (i not in partners, -self.capacity(i)))
+
+    def search(self) -> Optional[Set[int]]:
+        """Returns None once every task is assigned, otherwise the set of assigned tasks behind the failure."""
+        unassigned = [i for i, person in enumerate(self.assignment) if person is None]
+        if not unassigned:
+            return None
+        if self.out_of_time is not None and self.out_of_time():
+            # An empty conflict set sends every level above straight back up
+            self.timed_out = True
+            return set()
+        self.nodes += 1
+        # Most constrained task first
+        variable = min(unassigned, key=lambda i: (count_bits(self.domains[i]), i))
+        conflict_set = set()
+        for person in self.values(variable):
+            bit = 1 << person
+            self.assignment[variable] = person
+            self.load[person] += self.tasks[variable].weight
+            pruned = []
+            wiped_out = None
+            for other in unassigned:
+                if self.conflicts[variable][other] and self.domains[other] & bit:
+                    self.domains[other] &= ~bit
+                    self.past_fc[other].add(variable)
+                    pruned.append(other)
+                    if not self.domains[other]:
+                        wiped_out = other
+                        break
+            if wiped_out is None:
+                result = self.search()
+                if result is None:
+                    return None
+            else:
+                conflict_set |= self.past_fc[wiped_out]
+            for other in pruned:
+                self.domains[other] |= bit
+                self.past_fc[other].discard(variable)
+            self.assignment[variable] = None
+            self.load[person] -= self.tasks[variable].weight
+            if wiped_out is None:
+                if variable not in result:
+                    # Nothing this task could do differently fixes the failure, jump back past it
+                    return result
+                conflict_set |= result
+        conflict_set |= self.past_fc[variable]
+        conflict_set.discard(variable)
+        return conflict_set
+
+
+class ExactScheduler(Scheduler):
+    """
+    Scheduler that fills the tasks left after the preference pass with a complete search instead of the greedy.
+    Tasks only interact through the people holding them on the same day, so each day is searched on its own; a
+    pass only escalates request_weight when some day has provably no cover at the current weight. The search
+    stops with the rest of the solve once a time budget is spent.
+    """
+    infeasible_days: List[DateTimeClass]
+
+    def __init__(self, stats: Optional[SchedulerStats] = None, relaxation: str = 'restart'):
+        super().__init__(stats=stats, relaxation=relaxation)
+        self.infeasible_days = []
+
+    def assign_remaining_tasks(self, request_weight: float) -> bool:
+        self.infeasible_days = []
+        for day in self.days:
+            if self.out_of_time():
+                return False
+            tasks = [task for task in day.tasks if task in self.tasks_by_possibility]
+            if not tasks:
+                continue
+            solution = self.solve_day(day, tasks, request_weight)
+            if solution is None:
+                if not self.timed_out:
+                    self.infeasible_days.append(day.date)
+                return False
+            self.get_schedule_for_day(day)
+            for task in tasks:
+                self.schedule_assignment(solution[task], task, day)
+        return True
+
+    def solve_day(self, day: Day, tasks: List[Task], request_weight: float) -> Optional[Dict[Task, Person]]:
+        domains = []
+        for task in tasks:
+            eligible = self.eligibility.eligible_people(task, request_weight)
+            domains.append(sum(1 << i for i, ok in enumerate(eligible) if ok))
+        if not all(domains):
+            return None
+        return DaySearch(tasks, self.eligibility.people, domains, out_of_time=self.out_of_time).solve()
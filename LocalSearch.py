@@ -0,0 +1,233 @@
+import math
+import random
+import time
+from typing import List, Optional, Dict, Tuple
+
+import numpy as np
+
+from NewScheduler import Scheduler, Person, Task, DateTimeClass, tasks_conflict, sort_schedule_by_person_name
+
+
+def preference_penalty(preferences: List[Tuple[str, float, bool]], tasks: List[Task]) -> float:
+    """Minus the weight of the preferences met by these tasks plus the weight of the avoid preferences they break."""
+    penalty = 0.0
+    for target, weight, wanted in preferences:
+        if any(t.name == target or t.location == target for t in tasks):
+            penalty += -weight if wanted else weight
+    return penalty
+
+
+def person_preferences(person: Person) -> Dict[DateTimeClass, List[Tuple[str, float, bool]]]:
+    preferences = {}
+    for preference in person.preferences:
+        preferences.setdefault(preference.day, []).append((preference.task_or_location, preference.weight, True))
+    for preference in person.avoid_preferences:
+        preferences.setdefault(preference.day, []).append((preference.task_or_location, preference.weight, False))
+    return preferences
+
+
+def schedule_score(scheduler: Scheduler, preference_weight: float = 1.0) -> float:
+    """
+    Lower is better: the squared distance of every person from their max_weight, plus preference_weight times
+    the weight of broken avoid preferences less the weight of honoured preferences.
+    """
+    score = 0.0
+    for person in scheduler.people:
+        score += (person.current_weight - person.max_weight) ** 2
+        for date, preferences in person_preferences(person).items():
+            score += preference_weight * preference_penalty(preferences, person.tasks_on(date))
+    return score
+
+
+class LocalSearch:
+    """
+    Simulated annealing over a finished schedule. A neighbour moves one task to someone else, swaps two tasks
+    between people, or chains two moves (a's task to b, one of b's tasks to c), always within a single day. Moves
+    are scored by their change to schedule_score, which only involves the people and the day they touch. Zero
+    weight tasks (Vacation, Dev) carry no load and stay with whoever asked for them.
+    """
+    scheduler: Scheduler
+    people: List[Person]
+    tasks: List[Task]
+    owner: List[int]
+
+    def __init__(self, scheduler: Scheduler, preference_weight: float = 1.0, seed: Optional[int] = None):
+        self.scheduler = scheduler
+        self.preference_weight = preference_weight
+        self.random = random.Random(seed)
+        if scheduler.eligibility is None:
+            # A create_schedule whose time budget ran out may have left no matrix; build one over the held tasks too
+            scheduler.build_eligibility()
+            scheduler.eligibility.add_tasks([task for entries in scheduler.schedule.values() for _, task in entries])
+        eligibility = scheduler.eligibility
+        self.people = eligibility.people
+        person_index = eligibility.person_index
+        # Each day is held to the request weight it was solved at
+        weights = np.array([scheduler.day_weights.get(task.date, scheduler.request_weight)
+                            for task in eligibility.tasks], dtype=float)
+        allowed = eligibility.capable & (eligibility.avoid <= weights)
+
+        self.tasks = []
+        self.owner = []
+        self.allowed: List[List[bool]] = []
+        # Days are keyed by their ordinal to keep the inner loop on plain integers
+        self.held: Dict[Tuple[int, int], List[Task]] = {}
+        self.tasks_by_day: Dict[int, List[int]] = {}
+        for date, entries in scheduler.schedule.items():
+            for person, task in entries:
+                p = person_index[person]
+                self.held.setdefault((p, date.ordinal), []).append(task)
+                if task.weight > 0:
+                    self.tasks_by_day.setdefault(date.ordinal, []).append(len(self.tasks))
+                    self.tasks.append(task)
+                    self.owner.append(p)
+                    self.allowed.append(allowed[:, eligibility.task_index[task]].tolist())
+        self.days = list(self.tasks_by_day.items())
+        self.starting_owner = list(self.owner)
+
+        self.load = [person.current_weight for person in self.people]
+        self.max_weight = [person.max_weight for person in self.people]
+        self.preferences: Dict[Tuple[int, int], List[Tuple[str, float, bool]]] = {}
+        for p, person in enumerate(self.people):
+            for date, preferences in person_preferences(person).items():
+                self.preferences[(p, date.ordinal)] = preferences
+
+        self.score = schedule_score(scheduler, preference_weight)
+        self.starting_score = self.score
+        self.best_score = self.score
+        self.best_owner = list(self.owner)
+        self.evaluated = 0
+        self.accepted = 0
+
+    def evaluate(self, date: int, changes: List[Tuple[int, int]]) \
+            -> Optional[Tuple[float, Dict[int, List[Task]]]]:
+        """
+        Score handing each task k in changes to a new person on the day with this ordinal. Returns the change in
+        score and the resulting day lists of the people involved, or None if the result breaks a constraint.
+        """
+        for k, new_owner in changes:
+            if not self.allowed[k][new_owner]:
+                return None
+        load_change = {}
+        incoming = {}
+        outgoing = {}
+        for k, new_owner in changes:
+            task = self.tasks[k]
+            old_owner = self.owner[k]
+            load_change[old_owner] = load_change.get(old_owner, 0.0) - task.weight
+            load_change[new_owner] = load_change.get(new_owner, 0.0) + task.weight
+            outgoing.setdefault(old_owner, []).append(task)
+            incoming.setdefault(new_owner, []).append(task)
+
+        delta = 0.0
+        held_after = {}
+        for p, change in load_change.items():
+            if change:
+                delta += change * (2 * (self.load[p] - self.max_weight[p]) + change)
+            before = self.held.get((p, date), [])
+            leaving = outgoing.get(p, [])
+            after = [t for t in before if not any(t is o for o in leaving)]
+            arriving = incoming.get(p, [])
+            for task in arriving:
+                for other in after:
+                    if tasks_conflict(task, other):
+                        return None
+                after.append(task)
+            held_after[p] = after
+            preferences = self.preferences.get((p, date))
+            if preferences:
+                delta += self.preference_weight * (preference_penalty(preferences, after) -
+                                                   preference_penalty(preferences, before))
+        return delta, held_after
+
+    def apply(self, date: int, changes: List[Tuple[int, int]], delta: float,
+              held_after: Dict[int, List[Task]]):
+        for k, new_owner in changes:
+            weight = self.tasks[k].weight
+            self.load[self.owner[k]] -= weight
+            self.load[new_owner] += weight
+            self.owner[k] = new_owner
+        for p, held in held_after.items():
+            self.held[(p, date)] = held
+        self.score += delta
+        if self.score < self.best_score - 1e-9:
+            self.best_score = self.score
+            self.best_owner = list(self.owner)
+
+    def random_neighbour(self) -> Tuple[int, List[Tuple[int, int]]]:
+        draw = self.random.random
+        date, day_tasks = self.days[int(draw() * len(self.days))]
+        k = day_tasks[int(draw() * len(day_tasks))]
+        kind = draw()
+        if kind < 0.5 or len(day_tasks) < 2:
+            return date, [(k, int(draw() * len(self.people)))]
+        other = day_tasks[int(draw() * len(day_tasks))]
+        if kind < 0.85:
+            return date, [(k, self.owner[other]), (other, self.owner[k])]
+        return date, [(k, self.owner[other]), (other, int(draw() * len(self.people)))]
+
+    def is_trivial(self, changes: List[Tuple[int, int]]) -> bool:
+        return any(self.owner[k] == new_owner for k, new_owner in changes) or \
+            (len(changes) == 2 and changes[0][0] == changes[1][0])
+
+    def estimate_temperature(self, samples: int = 200) -> float:
+        """Average size of the worsening moves around the starting schedule."""
+        worse = []
+        for _ in range(samples):
+            date, changes = self.random_neighbour()
+            if self.is_trivial(changes):
+                continue
+            evaluation = self.evaluate(date, changes)
+            if evaluation is not None and evaluation[0] > 0:
+                worse.append(evaluation[0])
+        return sum(worse) / len(worse) if worse else 1.0
+
+    def run(self, time_budget: float = 1.0, max_iterations: Optional[int] = None,
+            initial_temperature: Optional[float] = None, final_temperature: Optional[float] = None) \
+            -> Dict[str, List[Tuple[Person, Task]]]:
+        """Anneal until the time budget (seconds) or iteration count runs out, then keep the best schedule seen."""
+        if not self.days or not self.people:
+            return self.scheduler.get_schedule()
+        if initial_temperature is None:
+            initial_temperature = self.estimate_temperature()
+        if final_temperature is None:
+            final_temperature = initial_temperature * 1e-3
+        cooling = math.log(final_temperature / initial_temperature)
+
+        start = time.perf_counter()
+        temperature = initial_temperature
+        iteration = 0
+        while max_iterations is None or iteration < max_iterations:
+            if iteration % 1024 == 0:
+                elapsed = time.perf_counter() - start
+                if elapsed >= time_budget:
+                    break
+                temperature = initial_temperature * math.exp(cooling * elapsed / time_budget)
+            iteration += 1
+            date, changes = self.random_neighbour()
+            if self.is_trivial(changes):
+                continue
+            evaluation = self.evaluate(date, changes)
+            self.evaluated += 1
+            if evaluation is None:
+                continue
+            delta, held_after = evaluation
+            if delta <= 0 or self.random.random() < math.exp(-delta / temperature):
+                self.apply(date, changes, delta, held_after)
+                self.accepted += 1
+
+        self.commit()
+        return self.scheduler.get_schedule()
+
+    def commit(self):
+        """Write the best schedule found back onto the scheduler and its people."""
+        for k, (start_owner, best_owner) in enumerate(zip(self.starting_owner, self.best_owner)):
+            if start_owner != best_owner:
+                self.scheduler.reassign_task(self.tasks[k], self.people[best_owner])
+        self.scheduler.schedule = sort_schedule_by_person_name(self.scheduler.schedule)
+
+
+def improve_schedule(scheduler: Scheduler, time_budget: float = 1.0, preference_weight: float = 1.0,
+                     seed: Optional[int] = None) -> Dict[str, List[Tuple[Person, Task]]]:
+    """Run the local search post-pass on a scheduler that has already been through create_schedule."""
+    return LocalSearch(scheduler, preference_weight=preference_weight, seed=seed).run(time_budget=time_budget)
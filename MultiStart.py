@@ -0,0 +1,67 @@
+import copy
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import List, Optional, Dict, Tuple, Callable
+
+from NewScheduler import Scheduler, Person, Task
+from LocalSearch import schedule_score
+
+# The unsolved scheduler each worker process solves copies of, set once per process by load_scenario
+_scenario: Optional[Scheduler] = None
+
+
+def load_scenario(scheduler: Scheduler):
+    global _scenario
+    _scenario = scheduler
+
+
+def count_unassigned(scheduler: Scheduler) -> int:
+    return sum(len(day.tasks) for day in scheduler.days)
+
+
+def solve_seed(seed: int, score: Callable[[Scheduler], float]) -> Tuple[int, int, float]:
+    """Solve a fresh copy of this process's scenario with the given seed; returns (seed, unassigned, score)."""
+    scheduler = copy.deepcopy(_scenario)
+    scheduler.random = random.Random(seed)
+    scheduler.create_schedule()
+    return seed, count_unassigned(scheduler), score(scheduler)
+
+
+class MultiStart:
+    """
+    Randomized multi-start greedy. Every run solves the same scenario with its own seed for the tie-breaks, the
+    runs are spread over a process pool and the best one (fewest unassigned tasks, then lowest score) is kept.
+    The scenario is sent to each worker once when the pool starts rather than with every run, and since a seed
+    fully determines its run only the seeds and scores come back; the winner is re-solved on the scheduler
+    itself.
+    """
+    scheduler: Scheduler
+    results: List[Tuple[int, int, float]]
+    best_seed: Optional[int]
+
+    def __init__(self, scheduler: Scheduler, score: Callable[[Scheduler], float] = schedule_score):
+        """score must be a module level function so it can be sent to the workers; lower is better."""
+        self.scheduler = scheduler
+        self.score = score
+        self.results = []
+        self.best_seed = None
+
+    def run(self, runs: int = 8, max_workers: Optional[int] = None, first_seed: int = 0) \
+            -> Dict[str, List[Tuple[Person, Task]]]:
+        seeds = range(first_seed, first_seed + runs)
+        workers = max_workers or os.cpu_count() or 1
+        chunksize = max(1, runs // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers, initializer=load_scenario,
+                                 initargs=(self.scheduler,)) as pool:
+            self.results = list(pool.map(solve_seed, seeds, repeat(self.score), chunksize=chunksize))
+        self.best_seed = min(self.results, key=lambda result: (result[1], result[2], result[0]))[0]
+        self.scheduler.random = random.Random(self.best_seed)
+        return self.scheduler.create_schedule()
+
+
+def multi_start(scheduler: Scheduler, runs: int = 8, max_workers: Optional[int] = None,
+                score: Callable[[Scheduler], float] = schedule_score) -> Dict[str, List[Tuple[Person, Task]]]:
+    """Solve an unsolved scheduler with the best of several randomized runs."""
+    return MultiStart(scheduler, score=score).run(runs=runs, max_workers=max_workers)
@@ -1,55 +1,108 @@
-import copy
+import heapq
+import logging
 import random
-from typing import List, Optional, Dict, Tuple
-from datetime import datetime
+import time
+from contextlib import contextmanager, nullcontext
+from itertools import takewhile
+from typing import List, Optional, Dict, Tuple, Iterable, Iterator, Callable, NamedTuple
+import datetime as dt
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
 
 
 class DateTimeClass(object):
+    """
+    Immutable calendar date backed by its proleptic Gregorian ordinal, so equality, hashing and ordering are
+    integer operations. Strings are only produced by to_string/__repr__ when a schedule is written out.
+    """
+    __slots__ = ('ordinal', 'year', 'month', 'day')
+    ordinal: int
     year: int
     month: int
     day: int
 
     def __init__(self, year: int, month: int, day: int):
-        self.year = year
-        self.day = day
-        self.month = month
+        object.__setattr__(self, 'ordinal', dt.date(year, month, day).toordinal())
+        object.__setattr__(self, 'year', year)
+        object.__setattr__(self, 'month', month)
+        object.__setattr__(self, 'day', day)
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, key):
+        raise AttributeError(f"{type(self).__name__} is immutable")
 
     def __eq__(self, other):
         if isinstance(other, DateTimeClass):
-            if self.__dict__ == other.__dict__:
-                return True
+            return self.ordinal == other.ordinal
         return False
 
+    def __hash__(self):
+        return hash(self.ordinal)
+
+    def __lt__(self, other):
+        if isinstance(other, DateTimeClass):
+            return self.ordinal < other.ordinal
+        return NotImplemented
+
+    def __le__(self, other):
+        if isinstance(other, DateTimeClass):
+            return self.ordinal <= other.ordinal
+        return NotImplemented
+
+    def __gt__(self, other):
+        if isinstance(other, DateTimeClass):
+            return self.ordinal > other.ordinal
+        return NotImplemented
+
+    def __ge__(self, other):
+        if isinstance(other, DateTimeClass):
+            return self.ordinal >= other.ordinal
+        return NotImplemented
+
     def __sub__(self, other):
         assert isinstance(other, DateTimeClass)
-        k = datetime(self.year, self.month, self.day)
-        k2 = datetime(other.year, other.month, other.day)
-        return k - k2
+        return dt.timedelta(days=self.ordinal - other.ordinal)
+
+    def __reduce__(self):
+        return DateTimeClass, (self.year, self.month, self.day)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
-    def from_rs_datetime(self, k):
-        self.year = k.Year
-        self.month = k.Month
-        self.day = k.Day
+    @classmethod
+    def from_ordinal(cls, ordinal: int) -> 'DateTimeClass':
+        k = dt.date.fromordinal(ordinal)
+        return cls(k.year, k.month, k.day)
 
-    def from_python_datetime(self, k: datetime):
-        self.year = k.year
-        self.month = k.month
-        self.day = k.day
+    @classmethod
+    def from_rs_datetime(cls, k) -> 'DateTimeClass':
+        return cls(k.Year, k.Month, k.Day)
 
-    def from_pandas_timestamp(self, k):
-        self.from_python_datetime(k)
+    @classmethod
+    def from_python_datetime(cls, k: dt.datetime) -> 'DateTimeClass':
+        return cls(k.year, k.month, k.day)
 
-    def from_string(self, k):
+    @classmethod
+    def from_pandas_timestamp(cls, k) -> 'DateTimeClass':
+        return cls.from_python_datetime(k)
+
+    @classmethod
+    def from_string(cls, k) -> 'DateTimeClass':
         year, month, day, hour, minute = k.split('.')
-        self.year = int(year)
-        self.month = int(month)
-        self.day = int(day)
+        return cls(int(year), int(month), int(day))
 
     def to_string(self):
         return f"{self.month}/{self.day}/{self.year}"
 
     def to_days(self):
-        return (self.year * 365) + (self.month * 31) + self.day
+        return self.ordinal
 
     def __repr__(self):
         return f"{self.month}/{self.day}/{self.year}"
@@ -62,6 +115,7 @@ class AbstractTask:
     compatible_with: List[str]
     requires: List[str]
     people_can_perform: List[str]
+    type_id: int
 
     def __init__(self, name: str, weight: float, compatible_with: Optional[List[str]] = None,
                  requires: Optional[List[str]] = None, location: Optional[str] = None):
@@ -71,24 +125,138 @@ class AbstractTask:
         self.requires = requires if requires else []
         self.location = location
         self.people_can_perform = []
+        self.type_id = task_types.intern(self)
+
+    def __setstate__(self, state):
+        # Type ids are only meaningful within one process, intern again when unpickled elsewhere
+        self.__dict__.update(state)
+        self.type_id = task_types.intern(self)
 
     def __repr__(self):
         return (f"Task(name={self.name}, weight={self.weight}, "
                 f"compatible_with={self.compatible_with}, requires={self.requires}, location={self.location})")
 
 
-class Task(AbstractTask):
+class TaskTypes:
+    """
+    Compiled task constraints. Task names and locations are interned to small integers and every distinct
+    (name, location, compatible_with) combination becomes a type id. conflicts[type_id] is a bitmask over type ids
+    of the types one person can not hold on the same day as that type (same name, another location, or neither
+    lists the other as compatible), so checking a task against a whole day of assignments is a single AND.
+    """
+    names: Dict[str, int]
+    locations: Dict[str, int]
+    types: Dict[Tuple[int, int, frozenset], int]
+    keys: List[Tuple[int, int, frozenset]]
+    conflicts: List[int]
+
+    def __init__(self):
+        self.names = {}
+        self.locations = {}
+        self.types = {}
+        self.keys = []
+        self.conflicts = []
+
+    def name_id(self, name: str) -> int:
+        return self.names.setdefault(name, len(self.names))
+
+    def location_id(self, location: Optional[str]) -> int:
+        if location is None:
+            return -1
+        return self.locations.setdefault(location, len(self.locations))
+
+    @staticmethod
+    def keys_conflict(key, other) -> bool:
+        name, location, compatible_with = key
+        other_name, other_location, other_compatible_with = other
+        if name == other_name:
+            return True
+        if location >= 0 and other_location >= 0 and location != other_location:
+            return True
+        return name not in other_compatible_with and other_name not in compatible_with
+
+    def intern(self, task: AbstractTask) -> int:
+        key = (self.name_id(task.name), self.location_id(task.location),
+               frozenset(self.name_id(name) for name in task.compatible_with))
+        type_id = self.types.get(key)
+        if type_id is not None:
+            return type_id
+        type_id = len(self.keys)
+        self.types[key] = type_id
+        self.keys.append(key)
+        mask = 0
+        for other_id, other in enumerate(self.keys):
+            if self.keys_conflict(key, other):
+                mask |= 1 << other_id
+                if other_id != type_id:
+                    self.conflicts[other_id] |= 1 << type_id
+        self.conflicts.append(mask)
+        return type_id
+
+
+# Shared by every task so type ids are comparable between schedulers and the people they share
+task_types = TaskTypes()
+
+
+class Task:
+    """
+    One dated occurrence of an AbstractTask. Only the reference to the AbstractTask, the date and the slot index
+    (which occurrence of that task on the day it is, numbered by Day) are stored; everything else is read from
+    the shared AbstractTask.
+    """
+    __slots__ = ('abstract_task', 'date', 'slot_index')
+    abstract_task: AbstractTask
     date: DateTimeClass
+    slot_index: int
 
-    def __init__(self, abstract_task: AbstractTask, date: DateTimeClass):
-        super().__init__(
-            name=abstract_task.name,
-            weight=abstract_task.weight,
-            compatible_with=abstract_task.compatible_with,
-            requires=abstract_task.requires,
-            location=abstract_task.location
-        )
+    def __init__(self, abstract_task: AbstractTask, date: DateTimeClass, slot_index: int = 0):
+        self.abstract_task = abstract_task
         self.date = date
+        self.slot_index = slot_index
+
+    @property
+    def name(self) -> str:
+        return self.abstract_task.name
+
+    @property
+    def weight(self) -> float:
+        return self.abstract_task.weight
+
+    @property
+    def location(self) -> Optional[str]:
+        return self.abstract_task.location
+
+    @property
+    def compatible_with(self) -> List[str]:
+        return self.abstract_task.compatible_with
+
+    @property
+    def requires(self) -> List[str]:
+        return self.abstract_task.requires
+
+    @property
+    def people_can_perform(self) -> List[str]:
+        return self.abstract_task.people_can_perform
+
+    @property
+    def type_id(self) -> int:
+        return self.abstract_task.type_id
+
+    def __repr__(self):
+        return (f"Task(name={self.name}, weight={self.weight}, "
+                f"compatible_with={self.compatible_with}, requires={self.requires}, location={self.location})")
+
+
+# The AbstractTasks behind Vacation and Dev requests, shared by every away day
+_away_tasks: Dict[str, AbstractTask] = {}
+
+
+def away_task(name: str) -> AbstractTask:
+    """The AbstractTask for a day away (Vacation or Dev), one instance per name."""
+    abstract_task = _away_tasks.get(name)
+    if abstract_task is None:
+        abstract_task = _away_tasks[name] = AbstractTask(name, 0.0, location="Away", compatible_with=[])
+    return abstract_task
 
 
 class Preference:
@@ -104,13 +272,21 @@ class Preference:
     def __repr__(self):
         return f"{self.task_or_location} on {self.day}"
 
+
+def day_types(tasks: Iterable[Task]) -> int:
+    """Bitmask of the type ids of the given tasks."""
+    mask = 0
+    for task in tasks:
+        mask |= 1 << task.type_id
+    return mask
+
+
 class Person:
     name: str
     weight_per_day: float
     max_weight: float
     preferences: List[Preference]
     avoid_preferences: List[Preference]
-    schedule: List[Tuple[str, Task]]
     current_weight: float
     performable_tasks: List[AbstractTask]
 
@@ -120,7 +296,10 @@ class Person:
         self.weight_per_day = weight_per_day
         self.preferences = preferences if preferences else []
         self.avoid_preferences = avoid_preferences if avoid_preferences else []
-        self.schedule = []
+        self._assignments: List[Task] = []
+        # Assignments bucketed by date, with a bitmask of the task types held on each day
+        self._day_tasks: Dict[DateTimeClass, List[Task]] = {}
+        self._day_types: Dict[DateTimeClass, int] = {}
         self.current_weight = 0.0
         self.max_weight = 0.0
         # Set default performable tasks
@@ -128,6 +307,61 @@ class Person:
             performable_tasks = []
         self.performable_tasks = performable_tasks
         self.add_dev_vacation()
+        self.index_preferences()
+
+    def index_preferences(self):
+        """
+        Index the preferences and avoid preferences by date, heaviest first, and the heaviest avoid weight by
+        (date, task or location), so avoid checks and a day's requests are dict hits instead of list scans. Changes
+        made through add_preference/remove_preference keep the index current; after editing the lists directly
+        call this again (create_schedule does so for everyone).
+        """
+        self._preferences_by_day: Dict[DateTimeClass, List[Preference]] = {}
+        self._avoid_by_day: Dict[DateTimeClass, List[Preference]] = {}
+        self._avoid_weights: Dict[Tuple[DateTimeClass, str], float] = {}
+        for preference in self.preferences:
+            self._index_preference(preference, False)
+        for preference in self.avoid_preferences:
+            self._index_preference(preference, True)
+
+    def _index_preference(self, preference: Preference, avoid: bool):
+        by_day = self._avoid_by_day if avoid else self._preferences_by_day
+        day_preferences = by_day.setdefault(preference.day, [])
+        # After every preference at least as heavy, keeping list order between equal weights
+        index = len(day_preferences)
+        while index > 0 and day_preferences[index - 1].weight < preference.weight:
+            index -= 1
+        day_preferences.insert(index, preference)
+        if avoid:
+            key = (preference.day, preference.task_or_location)
+            self._avoid_weights[key] = max(self._avoid_weights.get(key, float('-inf')), preference.weight)
+
+    def add_preference(self, preference: Preference, avoid: bool = False):
+        (self.avoid_preferences if avoid else self.preferences).append(preference)
+        self._index_preference(preference, avoid)
+
+    def remove_preference(self, preference: Preference, avoid: bool = False):
+        (self.avoid_preferences if avoid else self.preferences).remove(preference)
+        by_day = self._avoid_by_day if avoid else self._preferences_by_day
+        day_preferences = by_day[preference.day]
+        day_preferences.remove(preference)
+        if not day_preferences:
+            del by_day[preference.day]
+        if avoid:
+            key = (preference.day, preference.task_or_location)
+            weights = [p.weight for p in day_preferences if p.task_or_location == preference.task_or_location]
+            if weights:
+                self._avoid_weights[key] = max(weights)
+            else:
+                del self._avoid_weights[key]
+
+    def preferences_on(self, date: DateTimeClass, minimum_weight: float = float('-inf')) -> List[Preference]:
+        """The preferences for a date weighing at least minimum_weight, heaviest first."""
+        return list(takewhile(lambda p: p.weight >= minimum_weight, self._preferences_by_day.get(date, ())))
+
+    def avoid_preferences_on(self, date: DateTimeClass, minimum_weight: float = float('-inf')) -> List[Preference]:
+        """The avoid preferences for a date weighing at least minimum_weight, heaviest first."""
+        return list(takewhile(lambda p: p.weight >= minimum_weight, self._avoid_by_day.get(date, ())))
 
     def add_dev_vacation(self):
         for t in [AbstractTask('Dev', 0.0, location="Away"), AbstractTask('HalfDev', 0.0),
@@ -138,38 +372,75 @@ class Person:
     def add_day(self):
         self.max_weight += self.weight_per_day
 
+    def avoid_weight(self, task: Task) -> float:
+        """Highest weight of the avoid preferences matching this task, -inf if there are none."""
+        weights = self._avoid_weights
+        weight = weights.get((task.date, task.name), float('-inf'))
+        if task.location is not None:
+            weight = max(weight, weights.get((task.date, task.location), float('-inf')))
+        return weight
+
+    def is_capable_of(self, task: Task) -> bool:
+        return any(i.name == task.name for i in self.performable_tasks)
+
     def can_perform_task(self, task: Task, weight: float) -> bool:
         # Check if this is in their avoidance preferences
-        for avoid_pref in self.avoid_preferences:
-            if (avoid_pref.day.to_string() == task.date.to_string() and
-                    (task.name == avoid_pref.task_or_location or
-                     task.location == avoid_pref.task_or_location) and
-                    avoid_pref.weight > weight):
-                return False
+        if self.avoid_weight(task) > weight:
+            return False
 
         # Check if the person can perform the task
-        if task.name not in [i.name for i in self.performable_tasks]:
+        if not self.is_capable_of(task):
             return False
+        return self.fits_day(task)
 
-        # Check location compatibility with tasks already scheduled on the same day
-        day_schedule = [t for d, t in self.schedule if d == task.date.to_string()]
-        for scheduled_task in day_schedule:
-            # Location check
-            if (scheduled_task.location is not None and task.location is not None
-                    and scheduled_task.location != task.location):
-                return False
-            # Compatibility check
-            if task.name not in scheduled_task.compatible_with and scheduled_task.name not in task.compatible_with:
-                return False
-            # Redundant task check
-            if task.name == scheduled_task.name:
-                return False
-        return True
+    def fits_day(self, task: Task) -> bool:
+        """Check the task against everything already scheduled for this person on the same day."""
+        return not task_types.conflicts[task.type_id] & self._day_types.get(task.date, 0)
+
+    @property
+    def schedule(self) -> List[Tuple[str, Task]]:
+        """The assignments as (date string, Task) tuples, in the order they were made."""
+        return [(task.date.to_string(), task) for task in self._assignments]
+
+    def tasks_on(self, date: DateTimeClass) -> List[Task]:
+        return self._day_tasks.get(date, [])
 
     def assign_task(self, task: Task):
-        self.schedule.append((task.date.to_string(), task))
+        day_key = task.date
+        self._assignments.append(task)
+        self._day_tasks.setdefault(day_key, []).append(task)
+        self._day_types[day_key] = self._day_types.get(day_key, 0) | 1 << task.type_id
         self.current_weight += task.weight
 
+    def unassign_task(self, task: Task):
+        """Undo assign_task for the given task."""
+        if self._assignments and self._assignments[-1] is task:
+            self._assignments.pop()
+        else:
+            self._assignments.remove(task)
+        day_key = task.date
+        day_schedule = self._day_tasks[day_key]
+        day_schedule.remove(task)
+        if day_schedule:
+            self._day_types[day_key] = day_types(day_schedule)
+        else:
+            del self._day_tasks[day_key]
+            del self._day_types[day_key]
+        self.current_weight -= task.weight
+
+    def release_days(self, dates: Iterable[DateTimeClass]):
+        """Forget the assignments held on these dates while keeping the weight they added to current_weight."""
+        dates = set(dates)
+        self._assignments = [task for task in self._assignments if task.date not in dates]
+        for day_key in dates:
+            self._day_tasks.pop(day_key, None)
+            self._day_types.pop(day_key, None)
+
+    def __setstate__(self, state):
+        # The day masks hold type ids, rebuild them from the (re-interned) tasks when unpickled
+        self.__dict__.update(state)
+        self._day_types = {day_key: day_types(tasks) for day_key, tasks in self._day_tasks.items()}
+
     def __repr__(self):
         return f"Person(name={self.name}, max_weight={self.max_weight}, current_weight={self.current_weight})"
 
@@ -197,12 +468,53 @@ class Day:
     name: str
     date: DateTimeClass
     tasks: List[Task]
+    open_by_name: Dict[str, List[Task]]
 
     def __init__(self, name: str, tasks: List[Task], date: DateTimeClass):
         self.name = name
         tasks = sorted(tasks, key=lambda p: p.weight, reverse=True)
         self.tasks = tasks
         self.date = date
+        # Number repeated tasks on the day, the two PODs become slots 0 and 1
+        slots = {}
+        for task in tasks:
+            task.slot_index = slots.get(task.name, 0)
+            slots[task.name] = task.slot_index + 1
+        self.index_tasks()
+
+    def index_tasks(self):
+        """Index the open tasks by name, each list in the order of tasks, so requires resolve without a scan."""
+        self.open_by_name = {}
+        for task in self.tasks:
+            self.open_by_name.setdefault(task.name, []).append(task)
+
+    def first_open(self, name: str) -> Optional[Task]:
+        """The first open task with this name, as a scan of tasks would find it."""
+        tasks = self.open_by_name.get(name)
+        return tasks[0] if tasks else None
+
+    def add_task(self, task: Task):
+        self.tasks.append(task)
+        self.open_by_name.setdefault(task.name, []).append(task)
+
+    def remove_task(self, task: Task) -> int:
+        """Take the task off the open tasks, returning the index it had."""
+        index = self.tasks.index(task)
+        del self.tasks[index]
+        self.open_by_name[task.name].remove(task)
+        return index
+
+    def insert_task(self, index: int, task: Task):
+        """Put a removed task back at its old index."""
+        self.tasks.insert(index, task)
+        position = sum(1 for t in self.tasks[:index] if t.name == task.name)
+        self.open_by_name.setdefault(task.name, []).insert(position, task)
+
+    def pop_task(self) -> Task:
+        """Take off the most recently added task."""
+        task = self.tasks.pop()
+        self.open_by_name[task.name].pop()
+        return task
 
     def __repr__(self):
         return f"Day(name={self.name}, tasks={self.tasks}, date={self.date})"
@@ -223,8 +535,438 @@ class Week:
         return f"Week(name={self.name}, days={self.days})"
 
 
-def sort_schedule_by_person_name(schedule: Dict[str, List[Tuple[Person, Task]]]) \
-        -> Dict[str, List[Tuple[Person, Task]]]:
+def tasks_conflict(task: Task, other: Task) -> bool:
+    """True if one person can not hold both tasks on the same day, the pairwise form of Person.fits_day."""
+    return bool(task_types.conflicts[task.type_id] >> other.type_id & 1)
+
+
+class EligibilityMatrix:
+    """
+    Person x task eligibility for one scheduling pass.
+
+    Eligibility is split into a boolean 'available' matrix (the person is capable of the task and it fits with
+    what they already hold that day) and a float 'avoid' matrix (the heaviest avoid preference against the task).
+    A person is eligible at a given weight when they are available and no avoid preference outweighs it, which
+    matches Person.can_perform_task. Only the row/day touched by an assignment needs refreshing afterwards.
+    """
+    people: List[Person]
+    tasks: List[Task]
+    capable: np.ndarray
+    available: np.ndarray
+    avoid: np.ndarray
+    checks: int
+
+    def __init__(self, people: List[Person], tasks: List[Task]):
+        self.people = list(people)
+        self.tasks = []
+        self.checks = 0  # person x task constraint evaluations made by this matrix
+        self.person_index = {person: i for i, person in enumerate(self.people)}
+        self.task_index = {}
+        self.columns_by_date = {}
+        self._capable = np.zeros((len(self.people), 0), dtype=bool)
+        self._available = np.zeros((len(self.people), 0), dtype=bool)
+        self._avoid = np.zeros((len(self.people), 0), dtype=float)
+        self.add_tasks(tasks)
+
+    # The matrices keep spare columns so adding a task does not copy them; these are views of the columns in use
+    @property
+    def capable(self) -> np.ndarray:
+        return self._capable[:, :len(self.tasks)]
+
+    @property
+    def available(self) -> np.ndarray:
+        return self._available[:, :len(self.tasks)]
+
+    @property
+    def avoid(self) -> np.ndarray:
+        return self._avoid[:, :len(self.tasks)]
+
+    def reserve(self, columns: int):
+        """Make room for at least this many columns, growing the capacity geometrically."""
+        capacity = self._capable.shape[1]
+        if columns <= capacity:
+            return
+        capacity = max(columns, 2 * capacity, 16)
+        used = len(self.tasks)
+        for name in ('_capable', '_available', '_avoid'):
+            matrix = getattr(self, name)
+            grown = np.zeros((len(self.people), capacity), dtype=matrix.dtype)
+            grown[:, :used] = matrix[:, :used]
+            setattr(self, name, grown)
+
+    def add_tasks(self, tasks: List[Task], out_of_time: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        Add a column per new task. Capability only depends on the task name, so it is evaluated once per distinct
+        name and broadcast to its columns; the day-level fit only needs checking on the days a person already holds
+        something, and avoid weights only where they have avoid preferences. out_of_time, if given, is polled
+        between people; once it is True the new columns are dropped again and False is returned.
+        """
+        tasks = [t for t in tasks if t not in self.task_index]
+        if not tasks:
+            return True
+        self.checks += len(self.people) * len(tasks)
+        start = len(self.tasks)
+        self.reserve(start + len(tasks))
+        by_name: Dict[str, List[int]] = {}
+        by_date: Dict[DateTimeClass, List[int]] = {}
+        by_target: Dict[Tuple[DateTimeClass, str], List[int]] = {}
+        for column, task in enumerate(tasks, start):
+            self.tasks.append(task)
+            self.task_index[task] = column
+            self.columns_by_date.setdefault(task.date, []).append(column)
+            by_name.setdefault(task.name, []).append(column)
+            by_date.setdefault(task.date, []).append(column)
+            by_target.setdefault((task.date, task.name), []).append(column)
+            if task.location is not None:
+                by_target.setdefault((task.date, task.location), []).append(column)
+
+        for columns in by_name.values():
+            task = self.tasks[columns[0]]
+            self._capable[:, columns] = np.array([person.is_capable_of(task) for person in self.people],
+                                                 dtype=bool)[:, np.newaxis]
+        added = slice(start, len(self.tasks))
+        self._available[:, added] = self._capable[:, added]
+        self._avoid[:, added] = float('-inf')
+        for row, person in enumerate(self.people):
+            if out_of_time is not None and out_of_time():
+                self.truncate(start)
+                return False
+            for date, columns in by_date.items():
+                if person.tasks_on(date):
+                    for column in columns:
+                        if self._capable[row, column]:
+                            self._available[row, column] = person.fits_day(self.tasks[column])
+                for preference in person.avoid_preferences_on(date):
+                    targets = by_target.get((date, preference.task_or_location))
+                    if targets is not None:
+                        self._avoid[row, targets] = np.maximum(self._avoid[row, targets], preference.weight)
+        return True
+
+    def add_task(self, task: Task):
+        self.add_tasks([task])
+
+    def truncate(self, columns: int):
+        """Drop every column from this one on."""
+        for task in reversed(self.tasks[columns:]):
+            del self.task_index[task]
+            date_columns = self.columns_by_date[task.date]
+            date_columns.pop()
+            if not date_columns:
+                del self.columns_by_date[task.date]
+        del self.tasks[columns:]
+
+    def rewind(self, columns: int, available: np.ndarray):
+        """
+        Go back to an earlier state of the matrix: drop the columns added since it had this many and put back the
+        available matrix copied then. Only available changes as people are assigned.
+        """
+        self.truncate(columns)
+        self.available[...] = available
+
+    def refresh(self, person: Person, date: DateTimeClass):
+        """Re-evaluate one person's day-level fit for every task on the given date."""
+        row = self.person_index.get(person)
+        if row is None:
+            return
+        columns = self.columns_by_date.get(date, [])
+        self.checks += len(columns)
+        for column in columns:
+            if self.capable[row, column]:
+                self.available[row, column] = person.fits_day(self.tasks[column])
+
+    def refresh_avoid(self, person: Person, date: DateTimeClass):
+        """Re-read one person's avoid preferences for every task on the given date."""
+        row = self.person_index.get(person)
+        if row is None:
+            return
+        columns = self.columns_by_date.get(date, [])
+        self.checks += len(columns)
+        for column in columns:
+            self.avoid[row, column] = person.avoid_weight(self.tasks[column])
+
+    def tasks_on(self, date: DateTimeClass) -> List[Task]:
+        return [self.tasks[column] for column in self.columns_by_date.get(date, [])]
+
+    def columns(self, tasks: List[Task]) -> np.ndarray:
+        return np.array([self.task_index[t] for t in tasks], dtype=np.intp)
+
+    def eligible(self, weight, columns: Optional[np.ndarray] = None) -> np.ndarray:
+        """Boolean people x columns matrix; weight may be a scalar or one weight per column."""
+        if columns is None:
+            return self.available & (self.avoid <= weight)
+        return self.available[:, columns] & (self.avoid[:, columns] <= weight)
+
+    def eligible_people(self, task: Task, weight: float) -> np.ndarray:
+        column = self.task_index[task]
+        return self.available[:, column] & (self.avoid[:, column] <= weight)
+
+    def is_eligible(self, person: Person, task: Task, weight: float) -> bool:
+        row, column = self.person_index[person], self.task_index[task]
+        return bool(self.available[row, column] and self.avoid[row, column] <= weight)
+
+    def count(self, task: Task, weight: float) -> int:
+        return int(np.count_nonzero(self.eligible_people(task, weight)))
+
+    def candidates(self, task: Task, weight: float) -> List[Person]:
+        return [self.people[i] for i in np.flatnonzero(self.eligible_people(task, weight))]
+
+
+def hopcroft_karp(adjacency: List[List[int]], right_count: int) -> List[int]:
+    """Maximum bipartite matching: the right vertex matched to each left vertex of adjacency, -1 if none."""
+    left_match = [-1] * len(adjacency)
+    right_match = [-1] * right_count
+    while True:
+        # Layer the graph from the free left vertices by alternating path length
+        distance = [-1] * len(adjacency)
+        queue = [u for u in range(len(adjacency)) if left_match[u] < 0]
+        for u in queue:
+            distance[u] = 0
+        found = False
+        for u in queue:
+            for v in adjacency[u]:
+                w = right_match[v]
+                if w < 0:
+                    found = True
+                elif distance[w] < 0:
+                    distance[w] = distance[u] + 1
+                    queue.append(w)
+        if not found:
+            return left_match
+
+        def augment(u: int) -> bool:
+            for v in adjacency[u]:
+                w = right_match[v]
+                if w < 0 or (distance[w] == distance[u] + 1 and augment(w)):
+                    left_match[u] = v
+                    right_match[v] = u
+                    return True
+            distance[u] = -1
+            return False
+
+        for u in range(len(adjacency)):
+            if left_match[u] < 0:
+                augment(u)
+
+
+_compatible_counts: Dict[int, int] = {}
+
+
+def max_compatible(types: int) -> int:
+    """Most tasks one person can hold on a day from the given bitmask of task types, none conflicting."""
+    count = _compatible_counts.get(types)
+    if count is None:
+        if not types:
+            return 0
+        lowest = types & -types
+        rest = types & ~lowest
+        count = max(max_compatible(rest),
+                    1 + max_compatible(rest & ~task_types.conflicts[lowest.bit_length() - 1]))
+        _compatible_counts[types] = count
+    return count
+
+
+class CoverCheck:
+    """
+    Necessary condition for covering a day's open tasks at a request_weight: a maximum matching of tasks to people,
+    each person repeated as many times as tasks they could hold together that day. Judged as loosely as the solve
+    could be, so it never rules out a weight at which create_schedule would succeed.
+    """
+    eligibility: EligibilityMatrix
+
+    def __init__(self, eligibility: EligibilityMatrix):
+        self.eligibility = eligibility
+
+    def thresholds(self, day: Day) -> np.ndarray:
+        """The highest weight each person x open task could be assigned at, beyond the request_weight."""
+        people = self.eligibility.people
+        required = {}
+        for task in day.tasks:
+            for name in task.requires:
+                required[name] = max(required.get(name, float('-inf')), task.weight)
+        bound = np.tile(np.array([required.get(task.name, float('-inf')) for task in day.tasks]), (len(people), 1))
+        for i, person in enumerate(people):
+            for preference in person.preferences_on(day.date):
+                for j, task in enumerate(day.tasks):
+                    if task.name == preference.task_or_location:
+                        bound[i, j] = max(bound[i, j], preference.weight)
+        return bound
+
+    def uncovered(self, day: Day, weight: float, bound: Optional[np.ndarray] = None) -> List[Task]:
+        """The open tasks of the day a maximum matching leaves uncovered at this weight, empty if it covers them."""
+        tasks = day.tasks
+        if not tasks:
+            return []
+        if bound is None:
+            bound = self.thresholds(day)
+        columns = self.eligibility.columns(tasks)
+        eligible = (self.eligibility.available[:, columns] &
+                    (self.eligibility.avoid[:, columns] <= np.maximum(weight, bound)))
+        type_bits = [1 << task.type_id for task in tasks]
+        adjacency = [[] for _ in tasks]
+        copies = 0
+        for row in np.flatnonzero(eligible.any(axis=1)):
+            held = np.flatnonzero(eligible[row]).tolist()
+            types = 0
+            for j in held:
+                types |= type_bits[j]
+            person_copies = range(copies, copies + min(len(held), max_compatible(types)))
+            for j in held:
+                adjacency[j].extend(person_copies)
+            copies = person_copies.stop
+        matching = hopcroft_karp(adjacency, copies)
+        return [task for task, match in zip(tasks, matching) if match < 0]
+
+    def minimum_weight(self, day: Day, weights: Iterable[float]) -> Optional[float]:
+        """The first of the weights (in increasing order) at which the day may be covered, None if none."""
+        bound = self.thresholds(day)
+        for weight in weights:
+            if not self.uncovered(day, weight, bound):
+                return weight
+        return None
+
+
+class IndexedHeap:
+    """
+    Binary min-heap of hashable items that remembers where each item sits, so an item can be removed or have
+    its key changed in O(log n) without searching the heap.
+    """
+    def __init__(self, items_with_keys: Optional[List[Tuple[object, object]]] = None):
+        self._items = []
+        self._keys = []
+        self._positions = {}
+        for item, key in items_with_keys or []:
+            self._positions[item] = len(self._items)
+            self._items.append(item)
+            self._keys.append(key)
+        for i in reversed(range(len(self._items) // 2)):
+            self._sift_down(i)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __bool__(self):
+        return bool(self._items)
+
+    def __contains__(self, item):
+        return item in self._positions
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def key(self, item):
+        return self._keys[self._positions[item]]
+
+    def peek(self):
+        return self._items[0]
+
+    def ordered(self) -> Iterator[Tuple[object, object]]:
+        """
+        Yield (item, key) pairs in key order without taking them off the heap. Lazy, so stopping after k items
+        costs O(k log k); the heap must not change while this is being iterated.
+        """
+        if not self._items:
+            return
+        frontier = [(self._keys[0], 0)]
+        while frontier:
+            key, index = heapq.heappop(frontier)
+            yield self._items[index], key
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(self._items):
+                    heapq.heappush(frontier, (self._keys[child], child))
+
+    def push(self, item, key):
+        if item in self._positions:
+            self.update(item, key)
+            return
+        self._positions[item] = len(self._items)
+        self._items.append(item)
+        self._keys.append(key)
+        self._sift_up(len(self._items) - 1)
+
+    def pop(self):
+        item = self._items[0]
+        self.remove(item)
+        return item
+
+    def remove(self, item):
+        """Remove the item and return the key it had."""
+        index = self._positions.pop(item)
+        key = self._keys[index]
+        last_item = self._items.pop()
+        last_key = self._keys.pop()
+        if index < len(self._items):
+            self._items[index] = last_item
+            self._keys[index] = last_key
+            self._positions[last_item] = index
+            self._sift_up(index)
+            self._sift_down(self._positions[last_item])
+        return key
+
+    def update(self, item, key):
+        index = self._positions[item]
+        old_key = self._keys[index]
+        self._keys[index] = key
+        if key < old_key:
+            self._sift_up(index)
+        elif old_key < key:
+            self._sift_down(index)
+
+    def _swap(self, i: int, j: int):
+        self._items[i], self._items[j] = self._items[j], self._items[i]
+        self._keys[i], self._keys[j] = self._keys[j], self._keys[i]
+        self._positions[self._items[i]] = i
+        self._positions[self._items[j]] = j
+
+    def _sift_up(self, index: int):
+        while index > 0:
+            parent = (index - 1) // 2
+            if not self._keys[index] < self._keys[parent]:
+                break
+            self._swap(index, parent)
+            index = parent
+
+    def _sift_down(self, index: int):
+        size = len(self._items)
+        while True:
+            smallest = index
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < size and self._keys[child] < self._keys[smallest]:
+                    smallest = child
+            if smallest == index:
+                return
+            self._swap(index, smallest)
+            index = smallest
+
+
+class AssignmentTrail:
+    """
+    Journal of the changes the Scheduler makes while building a schedule. Each entry holds what is needed to
+    undo one change, so rolling back to a checkpoint costs O(changes since the checkpoint).
+    """
+    entries: List[Tuple]
+
+    def __init__(self):
+        self.entries = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    def checkpoint(self) -> int:
+        return len(self.entries)
+
+    def record(self, entry: Tuple):
+        self.entries.append(entry)
+
+    def pop_to(self, checkpoint: int) -> List[Tuple]:
+        """Remove and return the entries made since the checkpoint, most recent first."""
+        entries = self.entries[checkpoint:]
+        del self.entries[checkpoint:]
+        entries.reverse()
+        return entries
+
+
+def sort_schedule_by_person_name(schedule: Dict[DateTimeClass, List[Tuple[Person, Task]]]) \
+        -> Dict[DateTimeClass, List[Tuple[Person, Task]]]:
     # Iterate over each key in the dictionary
     for key in schedule:
         # Sort the list of (Person, Task) tuples by Person.name
@@ -233,28 +975,21 @@ def sort_schedule_by_person_name(schedule: Dict[str, List[Tuple[Person, Task]]])
     return schedule
 
 
-def get_tasks_sorted_by_performability(days: List[Day], people: List[Person]) -> List[Task]:
-    # Create a list to keep track of tasks and the number of people who can perform each task
-    task_performability = []
+def get_tasks_sorted_by_performability(days: List[Day], people: List[Person],
+                                       eligibility: Optional[EligibilityMatrix] = None) -> List[Task]:
+    tasks = [task for day in days for task in day.tasks]
+    if eligibility is None:
+        eligibility = EligibilityMatrix(people, tasks)
+    if not tasks:
+        return []
 
-    # Iterate over each day and each task within the day
-    for day in days:
-        for task in day.tasks:
-            # Count the number of people who can perform this task
-            count = 0
-            for person in people:
-                if person.can_perform_task(task, task.weight):
-                    count += 1
-            # Add the task and its count to the list
-            task_performability.append((task, count))
+    # Count the number of people who can perform each task, each task judged at its own weight
+    weights = np.array([task.weight for task in tasks], dtype=float)
+    counts = eligibility.eligible(weights, eligibility.columns(tasks)).sum(axis=0)
 
     # Sort tasks by the number of people who can perform them in ascending order
-    task_performability.sort(key=lambda x: x[1])
-
-    # Extract sorted tasks from the list of tuples
-    sorted_tasks = [task for task, _ in task_performability]
-
-    return sorted_tasks
+    order = np.argsort(counts, kind='stable')
+    return [tasks[i] for i in order]
 
 
 def get_day_by_string(days: List[Day], day_str: str) -> Optional[Day]:
@@ -264,151 +999,713 @@ def get_day_by_string(days: List[Day], day_str: str) -> Optional[Day]:
     return None
 
 
+class Assignments(NamedTuple):
+    """Parallel columns of assignments, one row each."""
+    ordinal: np.ndarray
+    task: np.ndarray
+    person: np.ndarray
+    weight: np.ndarray
+
+
+class ScheduleResult:
+    """
+    A schedule as parallel integer columns instead of (Person, Task) tuples: each row is one task on one day with
+    the date ordinal, the index of its name in task_names, the index of its holder in people (-1 for a task left
+    open) and its weight. Rows are sorted by day, then person, so on_day returns views of the columns without
+    copying. person_columns is a second copy of the columns sorted by person, open tasks first, each person's rows
+    kept in date order, so for_person and unassigned return views of it. Only names are kept, not the Person and
+    Task objects, so a solved year stays small even with the columns stored twice.
+    """
+    people: List[str]
+    task_names: List[str]
+    columns: Assignments
+    person_columns: Assignments
+    ordinals: np.ndarray
+
+    def __init__(self, people: List[str], task_names: List[str], ordinal: np.ndarray, task: np.ndarray,
+                 person: np.ndarray, weight: np.ndarray):
+        self.people = list(people)
+        self.task_names = list(task_names)
+        order = np.lexsort((person, ordinal))
+        self.columns = Assignments(np.asarray(ordinal, dtype=np.int32)[order], np.asarray(task, dtype=np.int32)[order],
+                                   np.asarray(person, dtype=np.int32)[order], np.asarray(weight, dtype=float)[order])
+        # Row ranges of each day and each person
+        self.ordinals, day_starts = np.unique(self.columns.ordinal, return_index=True)
+        self._day_rows = dict(zip(self.ordinals.tolist(), zip(day_starts.tolist(),
+                                                                  day_starts[1:].tolist() + [len(self)])))
+        order = np.argsort(self.columns.person, kind='stable')
+        self.person_columns = Assignments(*(column[order] for column in self.columns))
+        # Open tasks (person -1) come first, then person i's rows from _person_offsets[i + 1]
+        self._person_offsets = np.concatenate(
+            ([0], np.cumsum(np.bincount(self.columns.person + 1, minlength=len(self.people) + 1)))).tolist()
+
+    @classmethod
+    def from_scheduler(cls, scheduler: 'Scheduler') -> 'ScheduleResult':
+        """The scheduler's current schedule, with every day's open tasks as unassigned rows."""
+        person_index = {id(person): i for i, person in enumerate(scheduler.people)}
+        task_index: Dict[str, int] = {}
+        rows = []
+        for date, entries in scheduler.schedule.items():
+            for person, task in entries:
+                rows.append((date.ordinal, task_index.setdefault(task.name, len(task_index)),
+                             person_index[id(person)], task.weight))
+        for day in scheduler.days:
+            for task in day.tasks:
+                rows.append((day.date.ordinal, task_index.setdefault(task.name, len(task_index)), -1, task.weight))
+        ordinal, task, person, weight = (list(column) for column in zip(*rows)) if rows else ([], [], [], [])
+        return cls([person.name for person in scheduler.people], list(task_index), np.array(ordinal, dtype=np.int32),
+                   np.array(task, dtype=np.int32), np.array(person, dtype=np.int32), np.array(weight, dtype=float))
+
+    def __len__(self):
+        return len(self.columns.ordinal)
+
+    def on_day(self, date: DateTimeClass) -> Assignments:
+        """The day's rows, ordered by person with open tasks first; views into the columns."""
+        start, stop = self._day_rows.get(date.ordinal, (0, 0))
+        return Assignments(*(column[start:stop] for column in self.columns))
+
+    def for_person(self, person: int) -> Assignments:
+        """The rows held by the person (an index into people), in date order; views into person_columns."""
+        start, stop = self._person_offsets[person + 1], self._person_offsets[person + 2]
+        return Assignments(*(column[start:stop] for column in self.person_columns))
+
+    def unassigned(self) -> Assignments:
+        """The open tasks' rows, in date order; views into person_columns."""
+        start, stop = self._person_offsets[0], self._person_offsets[1]
+        return Assignments(*(column[start:stop] for column in self.person_columns))
+
+    def loads(self) -> np.ndarray:
+        """Total weight each person holds."""
+        assigned = self.columns.person >= 0
+        return np.bincount(self.columns.person[assigned], weights=self.columns.weight[assigned],
+                           minlength=len(self.people))
+
+    def daily_loads(self) -> np.ndarray:
+        """Weight each person holds on each day, shape (days, people) with days in the order of ordinals."""
+        assigned = self.columns.person >= 0
+        days = np.searchsorted(self.ordinals, self.columns.ordinal[assigned])
+        flat = days * len(self.people) + self.columns.person[assigned]
+        loads = np.bincount(flat, weights=self.columns.weight[assigned],
+                            minlength=len(self.ordinals) * len(self.people))
+        return loads.reshape(len(self.ordinals), len(self.people))
+
+    def task_counts(self) -> np.ndarray:
+        """How many of each task each person holds, shape (people, task_names)."""
+        assigned = self.columns.person >= 0
+        flat = self.columns.person[assigned] * len(self.task_names) + self.columns.task[assigned]
+        counts = np.bincount(flat, minlength=len(self.people) * len(self.task_names))
+        return counts.reshape(len(self.people), len(self.task_names))
+
+    def to_dict(self) -> Dict[str, List[Tuple[Optional[str], str]]]:
+        """
+        (person name, task name) pairs keyed by date string in date order, each day sorted by person name as in
+        get_schedule. Open tasks come first, with None for the person.
+        """
+        schedule = {}
+        for ordinal, (start, stop) in self._day_rows.items():
+            rows = [(self.people[person] if person >= 0 else None, self.task_names[task])
+                    for task, person in zip(self.columns.task[start:stop].tolist(),
+                                            self.columns.person[start:stop].tolist())]
+            schedule[DateTimeClass.from_ordinal(ordinal).to_string()] = sorted(
+                rows, key=lambda row: (row[0] is not None, row[0] or ''))
+        return schedule
+
+
+class SchedulerStats:
+    """
+    Opt-in counters and phase timings, summed over every create_schedule. on_phase, if given, is called with
+    (phase, request_weight, seconds) as each phase ends.
+    """
+    phases: Dict[str, float]
+    passes: int
+    escalations: int
+    constraint_checks: int
+    rolled_back: int
+    unassigned: List[str]
+    request_weight: float
+    timed_out: bool
+
+    def __init__(self, on_phase: Optional[Callable[[str, float, float], None]] = None):
+        self.on_phase = on_phase
+        self.reset()
+
+    def reset(self):
+        self.phases = {}
+        self.passes = 0
+        self.escalations = 0
+        self.constraint_checks = 0
+        self.rolled_back = 0
+        self.unassigned = []
+        self.request_weight = 0.0
+        self.timed_out = False
+
+    @contextmanager
+    def phase(self, name: str, request_weight: float = 0.0):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+            if self.on_phase is not None:
+                self.on_phase(name, request_weight, seconds)
+
+    def as_dict(self) -> Dict:
+        return {
+            'phases': dict(self.phases),
+            'passes': self.passes,
+            'escalations': self.escalations,
+            'constraint_checks': self.constraint_checks,
+            'rolled_back': self.rolled_back,
+            'unassigned': list(self.unassigned),
+            'request_weight': self.request_weight,
+            'timed_out': self.timed_out,
+        }
+
+
+class SolveProgress:
+    """What create_schedule passes its progress callback after each attempt. date is None in 'restart'."""
+    request_weight: float
+    date: Optional[DateTimeClass]
+    remaining: int
+    best_remaining: int
+    best_request_weight: float
+    elapsed: float
+    timed_out: bool
+
+    def __init__(self, request_weight: float, date: Optional[DateTimeClass], remaining: int, best_remaining: int,
+                 best_request_weight: float, elapsed: float, timed_out: bool):
+        self.request_weight = request_weight
+        self.date = date
+        self.remaining = remaining
+        self.best_remaining = best_remaining
+        self.best_request_weight = best_request_weight
+        self.elapsed = elapsed
+        self.timed_out = timed_out
+
+    def __repr__(self):
+        return (f"SolveProgress(request_weight={self.request_weight}, date={self.date}, remaining={self.remaining}, "
+                f"best_remaining={self.best_remaining}, elapsed={self.elapsed:.3f}, timed_out={self.timed_out})")
+
+
+# The ways create_schedule can raise request_weight, see Scheduler.__init__
+RELAXATIONS = ('restart', 'day')
+
+# The request_weight levels create_schedule escalates through
+REQUEST_WEIGHTS = tuple(float(weight) for weight in range(9))
+
+
 class Scheduler:
     people: List[Person]
-    schedule: Dict[str, List[Tuple[Person, Task]]]
+    schedule: Dict[DateTimeClass, List[Tuple[Person, Task]]]
     days: List[Day]
     assigned_tasks: List[str]
-    tasks_by_possibility: List[Task]
-
-    def __init__(self):
+    tasks_by_possibility: IndexedHeap
+    people_by_load: Optional[IndexedHeap]
+    eligibility: Optional[EligibilityMatrix]
+    trail: AssignmentTrail
+    request_weight: float
+    random: Optional[random.Random]
+    stats: Optional[SchedulerStats]
+    relaxation: str
+    day_weights: Dict[DateTimeClass, float]
+    minimum_weights: Dict[DateTimeClass, Optional[float]]
+    deadline: Optional[float]
+    timed_out: bool
+
+    def __init__(self, seed: Optional[int] = None, stats: Optional[SchedulerStats] = None,
+                 relaxation: str = 'restart'):
+        """
+        A seed randomizes tie-breaks. relaxation is how request_weight is raised when tasks can not all be covered,
+        see solve_by_restart and solve_by_day.
+        """
+        if relaxation not in RELAXATIONS:
+            raise ValueError(f"relaxation must be one of {RELAXATIONS}, not {relaxation!r}")
         self.people = []
         self.days = []
+        self.days_by_date = {}
         self.schedule = {}
-        self.tasks_by_possibility = []
+        self.tasks_by_possibility = IndexedHeap()
+        self.people_by_load = None
+        self.eligibility = None
+        self.trail = AssignmentTrail()
+        self.request_weight = 0.0
+        self.random = random.Random(seed) if seed is not None else None
+        self.stats = stats
+        self.relaxation = relaxation
+        self.day_weights = {}
+        self.minimum_weights = {}
+        self.deadline = None
+        self.timed_out = False
+        self.progress = None
+        self.solve_started = 0.0
+
+    def timed(self, phase: str):
+        """Time a phase into the stats, or do nothing when there are none."""
+        if self.stats is None:
+            return nullcontext()
+        return self.stats.phase(phase, self.request_weight)
+
+    def collect_checks(self):
+        if self.stats is not None and self.eligibility is not None:
+            self.stats.constraint_checks += self.eligibility.checks
+            self.eligibility.checks = 0
 
     def add_person(self, person: Person):
         self.people.append(person)
 
     def add_day(self, day: Day):
         self.days.append(day)
+        self.days_by_date[day.date] = day
 
     def reset(self):
         self.days = []
+        self.days_by_date = {}
         self.schedule = {}
+        self.eligibility = None
+
+    def compile(self):
+        """
+        Intern the type of every open task, rebuild each day's index of open tasks by name and every person's
+        preference index. All of these are built as the objects are created; this picks up any edits since.
+        """
+        for day in self.days:
+            for task in day.tasks:
+                task.abstract_task.type_id = task_types.intern(task.abstract_task)
+            day.index_tasks()
+        for person in self.people:
+            person.index_preferences()
+
+    def build_eligibility(self, days: Optional[List[Day]] = None) -> Optional[EligibilityMatrix]:
+        """
+        Build the matrix over the days' open tasks. If the time budget of the running create_schedule is spent
+        before it is finished, eligibility is left None.
+        """
+        days = self.days if days is None else days
+        eligibility = EligibilityMatrix(self.people, [])
+        built = eligibility.add_tasks([task for day in days for task in day.tasks], out_of_time=self.out_of_time)
+        self.eligibility = eligibility if built else None
+        return self.eligibility
+
+    def build_task_queue(self, days: Optional[List[Day]] = None) -> IndexedHeap:
+        """
+        Queue every open task keyed by how many people can currently perform it (most constrained first), ties
+        kept in day order or broken at random when seeded. Keys are kept current as assignments change who is
+        eligible.
+        """
+        days = self.days if days is None else days
+        tasks = [task for day in days for task in day.tasks]
+        counts = self.count_eligible(tasks)
+        if self.random is not None:
+            ties = [self.random.random() for _ in tasks]
+        else:
+            ties = range(len(tasks))
+        self.tasks_by_possibility = IndexedHeap([(task, (count, tie)) for task, count, tie in zip(tasks, counts, ties)])
+        return self.tasks_by_possibility
+
+    def count_eligible(self, tasks: List[Task]) -> List[int]:
+        """Number of people able to perform each task, each task judged at its own weight."""
+        if not tasks:
+            return []
+        weights = np.array([task.weight for task in tasks], dtype=float)
+        return self.eligibility.eligible(weights, self.eligibility.columns(tasks)).sum(axis=0).tolist()
+
+    @staticmethod
+    def load_key(person: Person, position: int) -> Tuple[float, int]:
+        """Most remaining capacity first, anyone still without work (999) before everyone, then list order."""
+        return -(person.max_weight - person.current_weight if person.current_weight != 0 else 999), position
+
+    def build_load_queue(self) -> IndexedHeap:
+        """Queue the people by load_key; kept current as assignments change their current_weight."""
+        self.people_by_load = IndexedHeap([(person, self.load_key(person, position))
+                                           for position, person in enumerate(self.people)])
+        return self.people_by_load
+
+    def refresh_load(self, person: Person):
+        queue = self.people_by_load
+        if queue is not None and person in queue:
+            queue.update(person, self.load_key(person, queue.key(person)[1]))
+
+    def least_loaded(self, eligible: np.ndarray) -> Optional[Person]:
+        """
+        The eligible person with the most remaining capacity, walking the load queue only as far as the first
+        one. Ties go to the earliest in people, or to one of the tied people at random when seeded.
+        """
+        queue = self.people_by_load
+        person_index = self.eligibility.person_index
+        candidates = (person for person, _ in queue.ordered() if eligible[person_index[person]])
+        selected = next(candidates, None)
+        if selected is None or self.random is None:
+            return selected
+        capacity = queue.key(selected)[0]
+        tied = [selected] + list(takewhile(lambda p: queue.key(p)[0] == capacity, candidates))
+        return self.random.choice(tied)
+
+    def refresh_eligibility(self, person: Person, date: DateTimeClass):
+        """Bring the eligibility matrix and the queued tasks' keys up to date after the person's day changed."""
+        if self.eligibility is None:
+            return
+        self.eligibility.refresh(person, date)
+        queue = self.tasks_by_possibility
+        queued = [task for task in self.eligibility.tasks_on(date) if task in queue]
+        for task, count in zip(queued, self.count_eligible(queued)):
+            queue.update(task, (count, queue.key(task)[1]))
 
     def assign_task(self, person: Person, task: Task) -> Tuple[Person, Task]:
-        if task in self.tasks_by_possibility:
-            self.tasks_by_possibility.remove(task)
+        self.dequeue_task(task)
         person.assign_task(task)
+        self.trail.record(('assign', person, task))
+        self.refresh_load(person)
+        self.refresh_eligibility(person, task.date)
         return person, task
 
+    def unassign_task(self, person: Person, task: Task):
+        person.unassign_task(task)
+        self.trail.record(('unassign', person, task))
+        self.refresh_load(person)
+        self.refresh_eligibility(person, task.date)
+
+    def reassign_task(self, task: Task, person: Person):
+        """Hand an already scheduled task to someone else, keeping its place in the day's schedule."""
+        entries = self.schedule[task.date]
+        index = next(i for i, (_, t) in enumerate(entries) if t is task)
+        previous = entries[index]
+        self.unassign_task(previous[0], task)
+        entries[index] = self.assign_task(person, task)
+        self.trail.record(('schedule_replace', task.date, index, previous))
+
+    def dequeue_task(self, task: Task):
+        if task in self.tasks_by_possibility:
+            key = self.tasks_by_possibility.remove(task)
+            self.trail.record(('dequeue', task, key))
+
+    def get_schedule_for_day(self, day: Day) -> List[Tuple[Person, Task]]:
+        if day.date not in self.schedule:
+            self.schedule[day.date] = []
+            self.trail.record(('schedule_day', day.date))
+        return self.schedule[day.date]
+
+    def schedule_assignment(self, person: Person, task: Task, day: Day):
+        """Assign the task, add it to the day's schedule and take it off the day's open tasks."""
+        self.get_schedule_for_day(day).append(self.assign_task(person, task))
+        self.trail.record(('schedule', day.date))
+        self.remove_day_task(day, task)
+
+    def unschedule_assignment(self, person: Person, task: Task, day: Day):
+        """Undo schedule_assignment: take the task back off the person and reopen it on the day."""
+        entries = self.schedule[day.date]
+        index = next(i for i, (_, t) in enumerate(entries) if t is task)
+        del entries[index]
+        self.trail.record(('unschedule', day.date, index, (person, task)))
+        self.unassign_task(person, task)
+        self.add_day_task(day, task)
+
+    def add_day_task(self, day: Day, task: Task):
+        day.add_task(task)
+        self.trail.record(('add_day_task', day, task))
+        if self.eligibility is not None:
+            self.eligibility.add_task(task)
+
+    def remove_day_task(self, day: Day, task: Task):
+        index = day.remove_task(task)
+        self.trail.record(('remove_day_task', day, task, index))
+
+    def checkpoint(self) -> int:
+        return self.trail.checkpoint()
+
+    def rollback(self, checkpoint: int):
+        """Undo every change recorded since the checkpoint."""
+        for entry in self.trail.pop_to(checkpoint):
+            kind = entry[0]
+            if kind == 'assign':
+                _, person, task = entry
+                person.unassign_task(task)
+                self.refresh_load(person)
+                self.refresh_eligibility(person, task.date)
+            elif kind == 'unassign':
+                _, person, task = entry
+                person.assign_task(task)
+                self.refresh_load(person)
+                self.refresh_eligibility(person, task.date)
+            elif kind == 'unschedule':
+                _, date, index, previous = entry
+                self.schedule[date].insert(index, previous)
+            elif kind == 'schedule_replace':
+                _, date, index, previous = entry
+                self.schedule[date][index] = previous
+            elif kind == 'dequeue':
+                _, task, key = entry
+                self.tasks_by_possibility.push(task, key)
+            elif kind == 'schedule':
+                self.schedule[entry[1]].pop()
+            elif kind == 'schedule_day':
+                del self.schedule[entry[1]]
+            elif kind == 'add_day_task':
+                _, day, task = entry
+                day.pop_task()
+            elif kind == 'remove_day_task':
+                _, day, task, index = entry
+                day.insert_task(index, task)
+
     def get_day_by_string(self, day_str: str) -> Optional[Day]:
         for day in self.days:
             if day.to_string() == day_str:
                 return day
         return None
 
+    def get_day(self, date: DateTimeClass) -> Optional[Day]:
+        return self.days_by_date.get(date)
+
     def assign_required_tasks(self, person: Person, task: Task, day: Day):
         for required_task_name in task.requires:
-            required_task = next((t for t in day.tasks if t.name == required_task_name), None)
-            if required_task and person.can_perform_task(required_task, task.weight):
-                self.schedule[day.to_string()].append(self.assign_task(person, required_task))
-                day.tasks.remove(required_task)
-                if required_task in self.tasks_by_possibility:
-                    self.tasks_by_possibility.remove(required_task)
+            required_task = day.first_open(required_task_name)
+            if required_task and self.eligibility.is_eligible(person, required_task, task.weight):
+                self.schedule_assignment(person, required_task, day)
 
     def handle_preference_assignment(self, person: Person, preference: Preference, day: Day, is_preference: bool,
                                      minimum_weight: float):
         # If the preference is for Vacation and the task is not present, add it
         if is_preference and preference.task_or_location in ["Vacation", "Dev"]:
-            vacation_task = Task(AbstractTask(preference.task_or_location, 0.0, location="Away", compatible_with=[]), day.date)
-            day.tasks.append(vacation_task)
+            vacation_task = Task(away_task(preference.task_or_location), day.date)
+            self.add_day_task(day, vacation_task)
+        eligibility = self.eligibility
         if is_preference:
             tasks = [t for t in day.tasks if t.name == preference.task_or_location or t.location == preference.task_or_location
-                     and person.can_perform_task(t, minimum_weight)]
+                     and eligibility.is_eligible(person, t, minimum_weight)]
         else:
             tasks = [t for t in day.tasks if t.name != preference.task_or_location and t.location != preference.task_or_location
-                     and person.can_perform_task(t, minimum_weight)]
-        tasks = [t for t in tasks if person.can_perform_task(t, preference.weight)]
+                     and eligibility.is_eligible(person, t, minimum_weight)]
+        tasks = [t for t in tasks if eligibility.is_eligible(person, t, preference.weight)]
 
         if not tasks:
             return
         # Sort tasks by the number of people available to perform them (ascending order)
         tasks_with_availability = []
         for task in tasks:
-            available_people_count = sum(1 for p in self.people if p.can_perform_task(task, preference.weight))
+            available_people_count = eligibility.count(task, preference.weight)
             tasks_with_availability.append((task, available_people_count))
         tasks_with_availability.sort(key=lambda x: x[1])
 
         # Assign the task with the fewest available people
         if tasks_with_availability:
             task = tasks_with_availability[0][0]
-            self.schedule[day.to_string()].append(self.assign_task(person, task))
-            day.tasks.remove(task)
+            self.schedule_assignment(person, task, day)
             self.assign_required_tasks(person, task, day)
 
     def fulfill_requests(self, minimum_weight=0.0):
-        """Attempt to fulfill the requests of each person before general scheduling."""
-        # Combine preferences and avoid_preferences into a single list
-        all_preferences = [(person, pref, True) for person in self.people for pref in person.preferences if
-                           pref.weight >= minimum_weight]
-        all_preferences += [(person, avoid_pref, False) for person in self.people for avoid_pref in
-                            person.avoid_preferences if avoid_pref.weight >= minimum_weight]
+        """
+        Attempt to fulfill the requests of each person before general scheduling. A request only involves its own
+        day, so the days are worked through one at a time.
+        """
+        if self.eligibility is None:
+            self.build_eligibility()
+        for day in self.days_by_date.values():
+            if self.out_of_time():
+                break
+            self.fulfill_day_requests(day, minimum_weight)
+
+    def fulfill_day_requests(self, day: Day, minimum_weight=0.0):
+        """Fulfill the requests for one day, heaviest first."""
+        # Combine the day's preferences and avoid_preferences into a single list
+        day_preferences = [(person, pref, True) for person in self.people
+                           for pref in person.preferences_on(day.date, minimum_weight)]
+        day_preferences += [(person, avoid_pref, False) for person in self.people
+                            for avoid_pref in person.avoid_preferences_on(day.date, minimum_weight)]
+        if not day_preferences:
+            return
 
         # Sort the combined list based on preference weight
-        all_preferences.sort(key=lambda x: x[1].weight, reverse=True)
-
-        for person, preference, is_preference in all_preferences:
-            # Find the corresponding day in the scheduler
-            day = self.get_day_by_string(preference.day.to_string())
+        day_preferences.sort(key=lambda x: x[1].weight, reverse=True)
+
+        self.get_schedule_for_day(day)
+        for person, preference, is_preference in day_preferences:
+            self.handle_preference_assignment(person, preference, day, is_preference, minimum_weight)
+
+    def assign_remaining_tasks(self, request_weight: float) -> bool:
+        """
+        Greedily assign every queued task, most constrained first, to the eligible person with the most remaining
+        capacity (see least_loaded). Returns False if a task was left with no eligible person, or the time budget
+        ran out first.
+        """
+        self.build_load_queue()
+        while self.tasks_by_possibility and not self.out_of_time():
+            task = self.tasks_by_possibility.peek()
+            self.dequeue_task(task)
+            day = self.get_day(task.date)
             if day:
-                if day.to_string() not in self.schedule:
-                    self.schedule[day.to_string()] = []
-                self.handle_preference_assignment(person, preference, day, is_preference, minimum_weight)
-
-    def create_schedule(self) -> Dict[str, List[Tuple[Person, Task]]]:
+                self.get_schedule_for_day(day)
+
+                # If no suitable candidates, break and bump up the request weight
+                selected_person = self.least_loaded(self.eligibility.eligible_people(task, request_weight))
+                if selected_person is None:
+                    break
+                self.schedule_assignment(selected_person, task, day)
+
+                # Handle required tasks
+                self.assign_required_tasks(selected_person, task, day)
+        # Only kept current while filling; rollbacks afterwards do not need it
+        self.people_by_load = None
+        return not self.tasks_by_possibility
+
+    def prepare(self) -> int:
+        """
+        Give everyone their capacity for the days, compile, and clear the schedule and trail ready for solving.
+        Returns the checkpoint every pass starts again from.
+        """
         for person in self.people:
             for _ in self.days:
                 person.add_day()
+        self.compile()
 
-        starting_people = copy.deepcopy(self.people)
-        starting_days = copy.deepcopy(self.days)
-
-        request_weight = -1.0
+        # Every pass starts again from here; the trail undoes the previous pass instead of copying the model
+        self.schedule = {}
+        self.tasks_by_possibility = IndexedHeap()
+        self.days_by_date = {day.date: day for day in self.days}
+        self.eligibility = None
+        self.trail = AssignmentTrail()
+        return self.checkpoint()
+
+    def out_of_time(self) -> bool:
+        """Whether the running create_schedule's time budget is spent; stays True once it is."""
+        if self.deadline is None:
+            return False
+        if not self.timed_out and time.perf_counter() >= self.deadline:
+            self.timed_out = True
+        return self.timed_out
+
+    def snapshot(self, days: List[Day]) -> List[Tuple[Day, Person, Task]]:
+        """The assignments on these days, to put back with restore."""
+        return [(day, person, task) for day in days for person, task in self.schedule.get(day.date, [])]
+
+    def restore(self, checkpoint: int, snapshot: List[Tuple[Day, Person, Task]]):
+        """Roll back to the checkpoint and make the snapshot's assignments again."""
+        self.rollback(checkpoint)
+        for day, person, task in snapshot:
+            if task not in day.open_by_name.get(task.name, ()):
+                # A Vacation/Dev task the request pass added to the day, gone with the rollback
+                self.add_day_task(day, task)
+            self.get_schedule_for_day(day)
+            self.schedule_assignment(person, task, day)
+
+    def report(self, request_weight: float, date: Optional[DateTimeClass], attempt_open: int, best: Tuple):
+        """Call the progress callback, if any, with the latest attempt's open count and the best (open, weight)."""
+        if self.progress is None:
+            return
+        remaining = sum(len(day.tasks) for day in self.days)
+        self.progress(SolveProgress(request_weight, date, remaining, remaining - attempt_open + best[0], best[1],
+                                    time.perf_counter() - self.solve_started, self.timed_out))
+
+    def unattempted(self) -> List[str]:
+        """Report a solve whose time budget ran out before its first attempt, leaving every task open."""
+        self.request_weight = REQUEST_WEIGHTS[0]
+        self.report(self.request_weight, None, 0, (0, self.request_weight))
+        return [f"{day.to_string()}:{task.name}" for day in self.days for task in day.tasks]
+
+    def precheck(self) -> Dict[DateTimeClass, Optional[float]]:
+        """
+        Lowest request_weight at which each day can possibly be covered, by CoverCheck, kept in minimum_weights
+        (None for a day no weight covers) so solving can skip passes bound to fail.
+        """
+        self.minimum_weights = {}
+        if self.eligibility is None and self.build_eligibility() is None:
+            return self.minimum_weights
+        check = CoverCheck(self.eligibility)
+        for date, day in self.days_by_date.items():
+            if self.out_of_time():
+                break
+            weight = check.minimum_weight(day, REQUEST_WEIGHTS)
+            self.minimum_weights[date] = weight
+            if weight is None:
+                uncovered = check.uncovered(day, REQUEST_WEIGHTS[-1])
+                logger.warning("No cover for %s at any request weight, uncoverable: %s", date,
+                               ", ".join(task.name for task in uncovered))
+            elif weight > REQUEST_WEIGHTS[0]:
+                uncovered = check.uncovered(day, weight - 1.0)
+                logger.info("No cover for %s below request weight %s, uncoverable: %s", date, weight,
+                            ", ".join(task.name for task in uncovered))
+        return self.minimum_weights
+
+    def create_schedule(self, time_budget: Optional[float] = None,
+                        progress: Optional[Callable[[SolveProgress], None]] = None) \
+            -> Dict[str, List[Tuple[Person, Task]]]:
+        """
+        Schedule every task, returning the assignments keyed by date string in date order. Once a time_budget in
+        seconds is spent the attempt that left the fewest tasks open is kept and timed_out is set.
+        """
+        self.solve_started = time.perf_counter()
+        self.deadline = None if time_budget is None else self.solve_started + time_budget
+        self.timed_out = False
+        self.progress = progress
+        start = self.prepare()
+        stats = self.stats
+
+        if self.relaxation == 'day':
+            remaining_tasks = self.solve_by_day()
+        else:
+            remaining_tasks = self.solve_by_restart(start)
+        self.deadline = None
+        self.progress = None
+
+        self.collect_checks()
+        if stats is not None:
+            stats.unassigned = remaining_tasks
+            stats.request_weight = self.request_weight
+            stats.timed_out = self.timed_out
+        if self.timed_out:
+            logger.warning("Time budget of %ss spent at request weight %s", time_budget, self.request_weight)
+        if remaining_tasks:
+            logger.warning("Could not assign all tasks, %d remain: %s", len(remaining_tasks),
+                           ", ".join(remaining_tasks))
+
+        # Sort the schedule by date, the keys are the dates themselves
+        self.schedule = sort_schedule_by_person_name(dict(sorted(self.schedule.items())))
+        return self.get_schedule()
+
+    def solve_by_restart(self, start: int) -> List[str]:
+        """
+        The 'restart' relaxation: solve the whole horizon again at each higher request_weight until every task is
+        covered. Returns the tasks left unassigned.
+        """
+        stats = self.stats
+        remaining_tasks = []
+        with self.timed('eligibility'):
+            self.build_eligibility()
+        if self.eligibility is not None:
+            with self.timed('precheck'):
+                self.precheck()
+        if self.out_of_time():
+            self.day_weights = {date: REQUEST_WEIGHTS[0] for date in self.days_by_date}
+            return self.unattempted()
+        eligibility = self.eligibility
+        start_columns, start_available = len(eligibility.tasks), eligibility.available.copy()
+        # Passes below the highest precheck minimum are bound to fail
+        lowest = max((REQUEST_WEIGHTS[-1] if weight is None else weight for weight in self.minimum_weights.values()),
+                     default=REQUEST_WEIGHTS[0])
+        request_weight = lowest - 1.0
+        best = None
         while request_weight < 8.0:
             request_weight += 1.0
-            self.schedule = {}
-            self.people = copy.deepcopy(starting_people)
-            self.days = copy.deepcopy(starting_days)
-            self.tasks_by_possibility = get_tasks_sorted_by_performability(self.days, self.people)
+            self.request_weight = request_weight
+            if stats is not None:
+                stats.passes += 1
+                stats.rolled_back += len(self.trail) - start
+            with self.timed('rollback'):
+                self.rollback(start)
+            self.collect_checks()
+            if self.eligibility is None:
+                with self.timed('eligibility'):
+                    eligibility.rewind(start_columns, start_available)
+                self.eligibility = eligibility
+            with self.timed('task_queue'):
+                self.build_task_queue()
 
             # Fulfill preferences
-            self.fulfill_requests(minimum_weight=request_weight)
+            with self.timed('fulfill_requests'):
+                self.fulfill_requests(minimum_weight=request_weight)
 
             # Assign remaining tasks
-
-            while self.tasks_by_possibility:
-                task = self.tasks_by_possibility.pop(0)
-                day = self.get_day_by_string(task.date.to_string())
-                if day:
-                    if day.to_string() == '8/27/2024':
-                        x = 1
-                    if day.to_string() not in self.schedule:
-                        self.schedule[day.to_string()] = []
-
-                    # Sort people by remaining weight capacity
-                    people_sorted = sorted(self.people, key=lambda p: p.max_weight -
-                                                                      p.current_weight if p.current_weight != 0 else 999
-                                           , reverse=True)
-                    candidates = [p for p in people_sorted if p.can_perform_task(task, request_weight)]
-
-                    # If no suitable candidates, break and bump up the request weight
-                    if candidates:
-                        selected_person = candidates[0]
-                    else:
-                        break
-                    self.schedule[day.to_string()].append(self.assign_task(selected_person, task))
-                    day.tasks.remove(task)
-
-                    # Handle required tasks
-                    self.assign_required_tasks(selected_person, task, day)
-
-            if self.tasks_by_possibility:
-                """
-                This means we broke out of the loop above because there were tasks nobody could complete
-                """
-                continue
+            with self.timed('assign_remaining_tasks'):
+                assigned = self.assign_remaining_tasks(request_weight)
             # Assign Dev tasks to those with remaining weight capacity
             # for day in self.days:
             #     for person in self.people:
@@ -423,20 +1720,120 @@ class Scheduler:
             #                 self.schedule[day.to_string()].append(self.assign_task(person, half_dev_task))
 
             remaining_tasks = [f"{day.to_string()}:{task.name}" for day in self.days for task in day.tasks]
-            if len(remaining_tasks) == 0:
+            # Kept restorable only when a time budget may need it
+            if best is None or len(remaining_tasks) < best[0]:
+                best = (len(remaining_tasks), request_weight,
+                        self.snapshot(self.days) if self.deadline is not None else None)
+            self.out_of_time()
+            self.report(request_weight, None, len(remaining_tasks), best)
+            if assigned and len(remaining_tasks) == 0:
                 break
-            else:
-                print(f"Could not assign all tasks, {len(remaining_tasks)} remain")
-                for remaining_task in remaining_tasks:
-                    print(remaining_task)
-
-        # Sort the schedule based on day.date.to_days()
-        sorted_schedule = dict(
-            sorted(self.schedule.items(), key=lambda item: next(
-                (d.date.to_days() for d in self.days if item[0] == d.to_string()), float('inf'))))
-        sorted_schedule = sort_schedule_by_person_name(sorted_schedule)
-        self.schedule = sorted_schedule
-        return self.schedule
+            if self.timed_out:
+                if best[1] != request_weight:
+                    with self.timed('rollback'):
+                        self.restore(start, best[2])
+                    self.request_weight = best[1]
+                    remaining_tasks = [f"{day.to_string()}:{task.name}" for day in self.days for task in day.tasks]
+                break
+            if request_weight < 8.0:
+                if stats is not None:
+                    stats.escalations += 1
+                logger.info("Could not assign all tasks at request weight %s, %d remain: %s", request_weight,
+                            len(remaining_tasks), ", ".join(remaining_tasks))
+                # The next pass rewinds the matrix, so the rollback need not keep it current
+                self.eligibility = None
+        self.day_weights = {date: self.request_weight for date in self.days_by_date}
+        return remaining_tasks
+
+    def solve_by_day(self) -> List[str]:
+        """
+        The 'day' relaxation: solve each day on its own, raising only a failing day's request_weight, kept in
+        day_weights. Returns the tasks left unassigned.
+        """
+        stats = self.stats
+        self.day_weights = {}
+        with self.timed('eligibility'):
+            self.build_eligibility()
+        if self.eligibility is not None:
+            with self.timed('precheck'):
+                self.precheck()
+        if self.out_of_time():
+            return self.unattempted()
+        # Requests and conflicts only involve their own day, so days are independent
+        for date, day in self.days_by_date.items():
+            day_start, day_columns = self.checkpoint(), len(self.eligibility.tasks)
+            request_weight = self.minimum_weights.get(date, REQUEST_WEIGHTS[0])
+            if request_weight is None:
+                request_weight = REQUEST_WEIGHTS[-1]
+            best = None
+            while True:
+                self.request_weight = request_weight
+                if stats is not None:
+                    stats.passes += 1
+                with self.timed('task_queue'):
+                    self.build_task_queue([day])
+                with self.timed('fulfill_requests'):
+                    self.fulfill_day_requests(day, minimum_weight=request_weight)
+                with self.timed('assign_remaining_tasks'):
+                    assigned = self.assign_remaining_tasks(request_weight)
+                if best is None or len(day.tasks) < best[0]:
+                    best = (len(day.tasks), request_weight, self.snapshot([day]) if self.deadline is not None else None)
+                self.out_of_time()
+                self.report(request_weight, date, len(day.tasks), best)
+                if (assigned and not day.tasks) or request_weight >= 8.0:
+                    break
+                if self.timed_out:
+                    # Keep the day's best attempt; the days after it stay open
+                    if best[1] != request_weight:
+                        with self.timed('rollback'):
+                            self.rollback(day_start)
+                            self.eligibility.truncate(day_columns)
+                            self.restore(day_start, best[2])
+                        request_weight = best[1]
+                    break
+                if stats is not None:
+                    stats.escalations += 1
+                    stats.rolled_back += len(self.trail) - day_start
+                logger.info("Could not assign all tasks on %s at request weight %s, %d remain", date,
+                            request_weight, len(day.tasks))
+                with self.timed('rollback'):
+                    self.rollback(day_start)
+                    # Drop the columns of the Vacation/Dev tasks the undone attempt added
+                    self.eligibility.truncate(day_columns)
+                request_weight += 1.0
+            self.day_weights[date] = request_weight
+            if self.timed_out:
+                break
+        self.request_weight = max(self.day_weights.values(), default=0.0)
+        return [f"{day.to_string()}:{task.name}" for day in self.days for task in day.tasks]
+
+    def get_schedule(self) -> Dict[str, List[Tuple[Person, Task]]]:
+        """The current schedule keyed by date string."""
+        return {date.to_string(): assignments for date, assignments in self.schedule.items()}
+
+    def get_result(self) -> ScheduleResult:
+        """The current schedule in columnar form, see ScheduleResult."""
+        return ScheduleResult.from_scheduler(self)
+
+    def stream_schedule(self, weeks: Iterable[Week], cache=None) \
+            -> Iterator[Tuple[Week, Dict[str, List[Tuple[Person, Task]]]]]:
+        """
+        Rolling-horizon scheduling: solve one week at a time as they are drawn from the iterable and yield each
+        (week, schedule) as soon as it is final. Each person's current_weight and max_weight carry over from one
+        week to the next so the load stays balanced across the horizon, while the assignments of finished weeks
+        are released from the people once the caller moves on, keeping memory bounded by a single week. With a
+        ScheduleCache each week is solved through it, so weeks already solved with the same carried-over state
+        are replayed instead.
+        """
+        for week in weeks:
+            self.reset()
+            for day in week.days:
+                self.add_day(day)
+            schedule = self.create_schedule() if cache is None else cache.solve(self)
+            yield week, schedule
+            for person in self.people:
+                person.release_days(day.date for day in week.days)
+        self.reset()
 
 
 def main():
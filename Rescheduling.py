@@ -0,0 +1,258 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional, Dict, Tuple
+
+from NewScheduler import Scheduler, Person, Task, Day, DateTimeClass, Preference, sort_schedule_by_person_name, \
+    away_task, REQUEST_WEIGHTS
+
+# Tasks a request puts someone away for the day; they belong to that person and are never handed around
+AWAY_TASKS = ("Vacation", "Dev")
+
+
+class ScheduleChange:
+    date: DateTimeClass
+    task: Task
+    before: Optional[Person]
+    after: Optional[Person]
+
+    def __init__(self, task: Task, before: Optional[Person], after: Optional[Person]):
+        self.date = task.date
+        self.task = task
+        self.before = before
+        self.after = after
+
+    def __repr__(self):
+        before = self.before.name if self.before else None
+        after = self.after.name if self.after else None
+        return f"ScheduleChange({self.date}: {self.task.name} {before} -> {after})"
+
+
+class ScheduleDelta(ABC):
+    """A change to a solved scenario. apply makes the change and returns the days that now need repairing."""
+    @abstractmethod
+    def apply(self, scheduler: Scheduler) -> List[Day]:
+        ...
+
+
+def held_on(scheduler: Scheduler, person: Person, day: Day) -> List[Task]:
+    return [task for p, task in scheduler.schedule.get(day.date, []) if p is person]
+
+
+def put_away(scheduler: Scheduler, person: Person, day: Day, task_name: str):
+    """Clear the person's day and give them the away task, as fulfill_requests does for a Vacation or Dev request."""
+    for task in held_on(scheduler, person, day):
+        if task.name == task_name:
+            continue
+        scheduler.unschedule_assignment(person, task, day)
+        if task.name in AWAY_TASKS:
+            # A different away task is taken off the day, as PersonAvailable does
+            scheduler.remove_day_task(day, task)
+    if any(task.name == task_name for task in held_on(scheduler, person, day)):
+        return
+    task = Task(away_task(task_name), day.date)
+    scheduler.add_day_task(day, task)
+    scheduler.schedule_assignment(person, task, day)
+
+
+class PersonUnavailable(ScheduleDelta):
+    """Someone can no longer work a day (called in sick, late vacation). Recorded as a Vacation request."""
+    def __init__(self, person: Person, date: DateTimeClass, weight: float = 9.0):
+        self.person = person
+        self.date = date
+        self.weight = weight
+
+    def apply(self, scheduler: Scheduler) -> List[Day]:
+        day = scheduler.get_day(self.date)
+        if day is None:
+            return []
+        self.person.add_preference(Preference(self.date, "Vacation", weight=self.weight))
+        put_away(scheduler, self.person, day, "Vacation")
+        return [day]
+
+
+class PersonAvailable(ScheduleDelta):
+    """Someone who was away can work a day after all; their Vacation/Dev request for it is withdrawn."""
+    def __init__(self, person: Person, date: DateTimeClass):
+        self.person = person
+        self.date = date
+
+    def apply(self, scheduler: Scheduler) -> List[Day]:
+        day = scheduler.get_day(self.date)
+        if day is None:
+            return []
+        for preference in self.person.preferences_on(self.date):
+            if preference.task_or_location in AWAY_TASKS:
+                self.person.remove_preference(preference)
+        for task in held_on(scheduler, self.person, day):
+            if task.name in AWAY_TASKS:
+                scheduler.unschedule_assignment(self.person, task, day)
+                scheduler.remove_day_task(day, task)
+        return [day]
+
+
+class TaskAdded(ScheduleDelta):
+    def __init__(self, task: Task):
+        self.task = task
+
+    def apply(self, scheduler: Scheduler) -> List[Day]:
+        day = scheduler.get_day(self.task.date)
+        if day is None:
+            return []
+        scheduler.add_day_task(day, self.task)
+        return [day]
+
+
+class TaskRemoved(ScheduleDelta):
+    def __init__(self, task: Task):
+        self.task = task
+
+    def apply(self, scheduler: Scheduler) -> List[Day]:
+        day = scheduler.get_day(self.task.date)
+        if day is None:
+            return []
+        for person, task in list(scheduler.schedule.get(day.date, [])):
+            if task is self.task:
+                scheduler.unschedule_assignment(person, task, day)
+        if self.task in day.tasks:
+            scheduler.remove_day_task(day, self.task)
+        return [day]
+
+
+class PreferenceChanged(ScheduleDelta):
+    """A preference (or with avoid=True an avoid preference) is added, or withdrawn with removed=True."""
+    def __init__(self, person: Person, preference: Preference, avoid: bool = False, removed: bool = False):
+        self.person = person
+        self.preference = preference
+        self.avoid = avoid
+        self.removed = removed
+
+    def apply(self, scheduler: Scheduler) -> List[Day]:
+        preferences = self.person.avoid_preferences if self.avoid else self.person.preferences
+        target = self.preference.task_or_location
+        if self.removed:
+            if self.preference in preferences:
+                self.person.remove_preference(self.preference, avoid=self.avoid)
+            if self.avoid or target not in AWAY_TASKS:
+                # Nothing already scheduled can break because a request went away
+                return []
+            return PersonAvailable(self.person, self.preference.day).apply(scheduler)
+        self.person.add_preference(self.preference, avoid=self.avoid)
+        day = scheduler.get_day(self.preference.day)
+        if day is None:
+            return []
+        if not self.avoid and target in AWAY_TASKS:
+            put_away(scheduler, self.person, day, target)
+        elif self.avoid and self.preference.weight > scheduler.day_weights.get(day.date, scheduler.request_weight):
+            for task in held_on(scheduler, self.person, day):
+                if task.name == target or task.location == target:
+                    scheduler.unschedule_assignment(self.person, task, day)
+        return [day]
+
+
+class Rescheduler:
+    """
+    Repairs a solved scheduler after a few deltas instead of solving the whole horizon again. The tasks the deltas
+    opened are first refilled on their own. If that fails, every task on the affected days and the days within
+    neighbourhood_days of them is reopened and refilled, their requests first, raising request_weight up to the
+    solver's highest only if it still can not be covered. Failed attempts are undone through the scheduler's trail.
+    """
+    scheduler: Scheduler
+    changes: List[ScheduleChange]
+
+    def __init__(self, scheduler: Scheduler, neighbourhood_days: int = 1):
+        self.scheduler = scheduler
+        self.neighbourhood_days = neighbourhood_days
+        self.changes = []
+
+    def snapshot(self) -> Dict[Task, Person]:
+        return {task: person for entries in self.scheduler.schedule.values() for person, task in entries}
+
+    def neighbourhood(self, days: List[Day]) -> List[Day]:
+        ordinals = {day.date.ordinal for day in days}
+        return [day for day in self.scheduler.days
+                if any(abs(day.date.ordinal - ordinal) <= self.neighbourhood_days for ordinal in ordinals)]
+
+    def refill(self, days: List[Day], request_weight: float, requests: bool = False) -> bool:
+        """
+        Assign the days' open tasks greedily. With requests the days' requests are fulfilled first, as solve_by_day
+        does, for days whose assignments were all reopened.
+        """
+        scheduler = self.scheduler
+        scheduler.build_eligibility(days)
+        scheduler.build_task_queue(days)
+        if requests:
+            for day in days:
+                open_away = [task for task in day.tasks if task.name in AWAY_TASKS]
+                scheduler.fulfill_day_requests(day, minimum_weight=request_weight)
+                # reopen kept the Vacation/Dev these requests grant, so the task they add again is left over
+                for task in [task for task in day.tasks if task.name in AWAY_TASKS and task not in open_away]:
+                    scheduler.remove_day_task(day, task)
+        return scheduler.assign_remaining_tasks(request_weight) and not any(day.tasks for day in days)
+
+    def reopen(self, days: List[Day], request_weight: float):
+        """
+        Unschedule every assignment on the days. A Vacation/Dev is kept if its request weighs at least
+        request_weight, so refill grants it again, or if it was not given by a request at all; one given by a
+        lighter request is taken off the day, as a solve at request_weight would never have granted it.
+        """
+        scheduler = self.scheduler
+        for day in days:
+            for person, task in list(scheduler.schedule.get(day.date, [])):
+                if task.name not in AWAY_TASKS:
+                    scheduler.unschedule_assignment(person, task, day)
+                    continue
+                weights = [p.weight for p in person.preferences_on(day.date) if p.task_or_location == task.name]
+                if weights and max(weights) < request_weight:
+                    scheduler.unschedule_assignment(person, task, day)
+                    scheduler.remove_day_task(day, task)
+
+    def repair(self, deltas: List[ScheduleDelta]) -> Tuple[Dict[str, List[Tuple[Person, Task]]], List[ScheduleChange]]:
+        scheduler = self.scheduler
+        before = self.snapshot()
+        full_eligibility = scheduler.eligibility
+
+        affected = {}
+        for delta in deltas:
+            for day in delta.apply(scheduler):
+                affected[day.date] = day
+        affected_days = sorted(affected.values(), key=lambda day: day.date)
+        region = self.neighbourhood(affected_days)
+
+        # Days solved on their own ('day' relaxation) keep their own weights
+        request_weight = max((scheduler.day_weights.get(day.date, scheduler.request_weight) for day in region),
+                             default=scheduler.request_weight)
+        start = scheduler.checkpoint()
+        if not self.refill(affected_days, request_weight):
+            while True:
+                scheduler.rollback(start)
+                self.reopen(region, request_weight)
+                if self.refill(region, request_weight, requests=True) or request_weight >= REQUEST_WEIGHTS[-1]:
+                    break
+                request_weight += 1.0
+            for day in region:
+                scheduler.day_weights[day.date] = request_weight
+            scheduler.request_weight = max(scheduler.request_weight, request_weight)
+
+        # Bring the full horizon's eligibility matrix back in line with the repaired days
+        if full_eligibility is not None:
+            full_eligibility.add_tasks([task for day in region for task in day.tasks] +
+                                       [task for day in region for _, task in scheduler.schedule.get(day.date, [])])
+            for person in scheduler.people:
+                for day in region:
+                    full_eligibility.refresh_avoid(person, day.date)
+                    full_eligibility.refresh(person, day.date)
+        scheduler.eligibility = full_eligibility
+        scheduler.schedule = sort_schedule_by_person_name(scheduler.schedule)
+
+        after = self.snapshot()
+        self.changes = []
+        for task in sorted(set(before) | set(after), key=lambda t: (t.date, t.name)):
+            old_person, new_person = before.get(task), after.get(task)
+            if old_person is not new_person:
+                self.changes.append(ScheduleChange(task, old_person, new_person))
+        return scheduler.get_schedule(), self.changes
+
+
+def reschedule(scheduler: Scheduler, deltas: List[ScheduleDelta], neighbourhood_days: int = 1) \
+        -> Tuple[Dict[str, List[Tuple[Person, Task]]], List[ScheduleChange]]:
+    """Apply the deltas to a solved scheduler and repair only the part of the schedule they touch."""
+    return Rescheduler(scheduler, neighbourhood_days=neighbourhood_days).repair(deltas)
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import tempfile
+from collections import Counter, OrderedDict
+from typing import List, Optional, Dict, Tuple
+
+from NewScheduler import Scheduler, Person, Task, sort_schedule_by_person_name, away_task
+
+# Bump when the key or the stored result changes shape, so stale files on disk are never matched
+CACHE_VERSION = 2
+
+
+def task_key(task: Task) -> List:
+    return [task.name, task.weight, task.location, list(task.compatible_with), list(task.requires),
+            list(task.people_can_perform)]
+
+
+def person_key(person: Person, dates: set) -> List:
+    """Everything about a person the solve over these dates can depend on."""
+    return [
+        type(person).__name__,
+        person.name,
+        person.weight_per_day,
+        person.max_weight,
+        person.current_weight,
+        sorted({task.name for task in person.performable_tasks}),
+        # List order breaks ties between equally weighted requests, so it is kept
+        [[p.day.ordinal, p.task_or_location, p.weight] for p in person.preferences if p.day in dates],
+        [[p.day.ordinal, p.task_or_location, p.weight] for p in person.avoid_preferences if p.day in dates],
+        [[date.ordinal, task.name] for date in sorted(dates) for task in person.tasks_on(date)],
+    ]
+
+
+def scenario_key(scheduler: Scheduler) -> str:
+    """
+    Canonical hash of what create_schedule would be solving: the people in order with their capacity,
+    capabilities, preferences and anything they already hold on the scheduler's days, and the days with their open
+    tasks. Preferences and holdings on other dates are left out, so a week hashes the same whatever else is in the
+    person's horizon. A seeded scheduler also hashes its random state, and the scheduler class is part of the key
+    as subclasses such as ExactScheduler solve the same inputs differently.
+    """
+    dates = {day.date for day in scheduler.days}
+    canonical = [
+        CACHE_VERSION,
+        type(scheduler).__qualname__,
+        scheduler.relaxation,
+        repr(scheduler.random.getstate()) if scheduler.random is not None else None,
+        [person_key(person, dates) for person in scheduler.people],
+        [[day.date.ordinal, day.name, [task_key(task) for task in day.tasks]] for day in scheduler.days],
+    ]
+    encoded = json.dumps(canonical, separators=(',', ':')).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def encode_result(scheduler: Scheduler, initial: Dict[int, Counter]) -> Dict:
+    """
+    A solved scheduler as plain data: per day the tasks solving added to it (Vacation/Dev requests) and each
+    assignment as (index into scheduler.people, task name). initial is each day's open task names before solving.
+    """
+    person_index = {id(person): i for i, person in enumerate(scheduler.people)}
+    days = []
+    for day in scheduler.days:
+        entries = scheduler.schedule.get(day.date)
+        if entries is None:
+            continue
+        names = Counter(task.name for _, task in entries) + Counter(task.name for task in day.tasks)
+        days.append([day.date.ordinal, sorted((names - initial[day.date.ordinal]).elements()),
+                     [[person_index[id(person)], task.name] for person, task in entries]])
+    return {
+        'request_weight': scheduler.request_weight,
+        'day_weights': [[date.ordinal, weight] for date, weight in scheduler.day_weights.items()],
+        'days': days,
+    }
+
+
+def apply_result(scheduler: Scheduler, result: Dict):
+    """
+    Replay an encoded result onto an unsolved scheduler with the same key, leaving it as create_schedule would. The
+    eligibility matrix is built first, so the replayed assignments keep it current for LocalSearch and Rescheduling.
+    """
+    scheduler.prepare()
+    scheduler.build_eligibility()
+    by_ordinal = {day.date.ordinal: day for day in scheduler.days}
+    for ordinal, added, assignments in result['days']:
+        day = by_ordinal[ordinal]
+        for name in added:
+            scheduler.add_day_task(day, Task(away_task(name), day.date))
+        scheduler.get_schedule_for_day(day)
+        for index, name in assignments:
+            scheduler.schedule_assignment(scheduler.people[index], day.first_open(name), day)
+    scheduler.request_weight = result['request_weight']
+    scheduler.day_weights = {by_ordinal[ordinal].date: weight for ordinal, weight in result['day_weights']}
+    scheduler.schedule = sort_schedule_by_person_name(dict(sorted(scheduler.schedule.items())))
+
+
+class ScheduleCache:
+    """
+    Content-addressed cache of solved schedules. solve(scheduler) hashes the scheduler's inputs with scenario_key
+    and either replays a stored result or runs create_schedule and stores what it found. Results are kept in
+    memory in least recently used order, evicting the oldest once there are more than max_entries or their
+    encoded size passes max_bytes. With a directory they are also written there as <key>.json and read back on a
+    memory miss, so they survive the process. Pass the cache to Scheduler.stream_schedule to reuse unchanged
+    weeks of a longer horizon. A replayed seeded scheduler's random state is left where it was.
+    """
+    entries: 'OrderedDict[str, Tuple[Dict, int]]'
+
+    def __init__(self, max_entries: int = 256, max_bytes: Optional[int] = 64 * 2 ** 20,
+                 directory: Optional[str] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.directory = directory
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key: str):
+        return key in self.entries or (self.directory is not None and os.path.exists(self.path(key)))
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict]:
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key][0]
+        if self.directory is None or not os.path.exists(self.path(key)):
+            return None
+        try:
+            with open(self.path(key)) as f:
+                encoded = f.read()
+            result = json.loads(encoded)
+        except (OSError, json.JSONDecodeError):
+            # Gone since the check, or not a file this cache wrote; solving again overwrites it
+            return None
+        self._insert(key, result, len(encoded))
+        return result
+
+    def put(self, key: str, result: Dict):
+        encoded = json.dumps(result, separators=(',', ':'))
+        if self.directory is not None:
+            # Written aside and moved into place, so a reader never sees half a file
+            fd, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    f.write(encoded)
+                os.replace(temporary, self.path(key))
+            except BaseException:
+                os.unlink(temporary)
+                raise
+        self._insert(key, result, len(encoded))
+
+    def _insert(self, key: str, result: Dict, size: int):
+        if key in self.entries:
+            self.size -= self.entries.pop(key)[1]
+        self.entries[key] = (result, size)
+        self.size += size
+        while len(self.entries) > self.max_entries or \
+                (self.max_bytes is not None and self.size > self.max_bytes and len(self.entries) > 1):
+            self.size -= self.entries.popitem(last=False)[1][1]
+
+    def clear(self):
+        """Empty the memory tier; files on disk are kept."""
+        self.entries.clear()
+        self.size = 0
+
+    def solve(self, scheduler: Scheduler) -> Dict[str, List[Tuple[Person, Task]]]:
+        """create_schedule through the cache."""
+        key = scenario_key(scheduler)
+        result = self.get(key)
+        if result is not None:
+            self.hits += 1
+            apply_result(scheduler, result)
+            return scheduler.get_schedule()
+        self.misses += 1
+        initial = {day.date.ordinal: Counter(task.name for task in day.tasks) for day in scheduler.days}
+        schedule = scheduler.create_schedule()
+        self.put(key, encode_result(scheduler, initial))
+        return schedule
@@ -0,0 +1,156 @@
+from typing import List, Optional, Dict, Tuple
+
+import numpy as np
+
+from NewScheduler import Scheduler, Person, Task
+
+
+class BatchScorer:
+    """
+    Scores many candidate schedules over the same people and tasks at once. A batch of candidates is an integer
+    array of shape (tasks, candidates) holding the index of the person given each task, or -1 if it was left
+    unassigned. Everything is computed with NumPy reductions over the whole batch.
+    """
+    people: List[Person]
+    tasks: List[Task]
+    locations: List[str]
+
+    def __init__(self, people: List[Person], tasks: List[Task], base_load: Optional[np.ndarray] = None,
+                 preference_weight: float = 1.0):
+        """base_load is weight each person already carries from outside these tasks (zero by default)."""
+        self.people = list(people)
+        self.tasks = list(tasks)
+        self.preference_weight = preference_weight
+        self.weights = np.array([task.weight for task in self.tasks], dtype=float)
+        self.max_weight = np.array([person.max_weight for person in self.people], dtype=float)
+        self.base_load = np.zeros(len(self.people)) if base_load is None else np.asarray(base_load, dtype=float)
+        self.locations = sorted({task.location for task in self.tasks if task.location is not None})
+        location_index = {location: i for i, location in enumerate(self.locations)}
+        self.task_location = np.array([location_index.get(task.location, -1) for task in self.tasks], dtype=np.intp)
+
+        # Tasks each preference target could be met by, found through (date, name) and (date, location)
+        by_target: Dict[Tuple, List[int]] = {}
+        for j, task in enumerate(self.tasks):
+            by_target.setdefault((task.date, task.name), []).append(j)
+            if task.location is not None and task.location != task.name:
+                by_target.setdefault((task.date, task.location), []).append(j)
+        self.preferences = self._preference_pairs(
+            [(p, pref) for p, person in enumerate(self.people) for pref in person.preferences], by_target)
+        self.avoid_preferences = self._preference_pairs(
+            [(p, pref) for p, person in enumerate(self.people) for pref in person.avoid_preferences], by_target)
+
+    @staticmethod
+    def _preference_pairs(preferences, by_target) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Flatten preferences into (task, person) pairs grouped by preference, returning the pair tasks, the pair
+        people, the start of each group and each group's weight. Preferences no task could meet are dropped.
+        """
+        pair_tasks, pair_people, starts, weights = [], [], [], []
+        for p, preference in preferences:
+            tasks = by_target.get((preference.day, preference.task_or_location))
+            if not tasks:
+                continue
+            starts.append(len(pair_tasks))
+            weights.append(preference.weight)
+            pair_tasks += tasks
+            pair_people += [p] * len(tasks)
+        return (np.array(pair_tasks, dtype=np.intp), np.array(pair_people, dtype=np.intp),
+                np.array(starts, dtype=np.intp), np.array(weights, dtype=float))
+
+    def loads(self, assignments: np.ndarray) -> np.ndarray:
+        """Weight each person carries in each candidate, shape (candidates, people)."""
+        assignments = np.asarray(assignments)
+        candidates = assignments.shape[1]
+        assigned = assignments >= 0
+        rows = np.broadcast_to(np.arange(candidates) * len(self.people), assignments.shape)
+        flat = (rows + assignments)[assigned]
+        weights = np.broadcast_to(self.weights[:, None], assignments.shape)[assigned]
+        loads = np.bincount(flat, weights=weights, minlength=candidates * len(self.people))
+        return loads.reshape(candidates, len(self.people)) + self.base_load
+
+    def _met(self, assignments: np.ndarray, preferences) -> np.ndarray:
+        """Total weight of the preferences met in each candidate."""
+        pair_tasks, pair_people, starts, weights = preferences
+        if not len(starts):
+            return np.zeros(assignments.shape[1])
+        hits = (assignments[pair_tasks, :] == pair_people[:, None]).astype(np.int32)
+        met = np.add.reduceat(hits, starts, axis=0) > 0
+        return weights @ met
+
+    def location_counts(self, assignments: np.ndarray) -> np.ndarray:
+        """Tasks each person holds at each location, shape (candidates, people, locations)."""
+        assignments = np.asarray(assignments)
+        candidates = assignments.shape[1]
+        people, locations = len(self.people), len(self.locations)
+        located = np.broadcast_to(self.task_location[:, None], assignments.shape)
+        counted = (assignments >= 0) & (located >= 0)
+        rows = np.broadcast_to(np.arange(candidates)[None, :], assignments.shape)
+        flat = ((rows * people + assignments) * locations + located)[counted]
+        counts = np.bincount(flat, minlength=candidates * people * locations)
+        return counts.reshape(candidates, people, locations)
+
+    def score(self, assignments: np.ndarray) -> Dict[str, np.ndarray]:
+        """Every metric for every candidate; each entry is indexed by candidate first."""
+        assignments = np.asarray(assignments)
+        loads = self.loads(assignments)
+        remaining = self.max_weight - loads
+        satisfied = self._met(assignments, self.preferences)
+        violated = self._met(assignments, self.avoid_preferences)
+        balance = (remaining ** 2).sum(axis=1)
+        return {
+            'load_variance': remaining.var(axis=1),
+            'balance': balance,
+            'preference_satisfaction': satisfied,
+            'avoid_violations': violated,
+            'unassigned': (assignments < 0).sum(axis=0),
+            'location_counts': self.location_counts(assignments),
+            'total': balance + self.preference_weight * (violated - satisfied),
+        }
+
+    def total(self, assignments: np.ndarray) -> np.ndarray:
+        """Same objective as LocalSearch.schedule_score, lower is better, one value per candidate."""
+        assignments = np.asarray(assignments)
+        remaining = self.max_weight - self.loads(assignments)
+        violated = self._met(assignments, self.avoid_preferences)
+        satisfied = self._met(assignments, self.preferences)
+        return (remaining ** 2).sum(axis=1) + self.preference_weight * (violated - satisfied)
+
+    def rank(self, assignments: np.ndarray) -> np.ndarray:
+        """Candidate indices from best to worst: fewest unassigned tasks first, then lowest total."""
+        assignments = np.asarray(assignments)
+        return np.lexsort((self.total(assignments), (assignments < 0).sum(axis=0)))
+
+    @classmethod
+    def from_schedulers(cls, schedulers: List[Scheduler], preference_weight: float = 1.0) \
+            -> Tuple['BatchScorer', np.ndarray]:
+        """
+        Encode solved schedulers over the same scenario (for instance copies solved with different seeds) into one
+        batch. People are matched by name. Tasks are matched by date, name and occurrence, so interchangeable
+        tasks such as the two PODs of a day line up whoever holds them.
+        """
+        people = schedulers[0].people
+        person_index = {person.name: i for i, person in enumerate(people)}
+        tasks: List[Task] = []
+        task_index: Dict[Tuple, int] = {}
+        encoded = []
+        for scheduler in schedulers:
+            holders = {}
+            occurrences = {}
+            for date in sorted(set(scheduler.schedule) | {day.date for day in scheduler.days}):
+                day = scheduler.get_day(date)
+                held = [(person_index[person.name], task) for person, task in scheduler.schedule.get(date, [])]
+                open_tasks = [(-1, task) for task in day.tasks] if day else []
+                for holder, task in held + open_tasks:
+                    occurrence = occurrences.get((date, task.name), 0)
+                    occurrences[(date, task.name)] = occurrence + 1
+                    key = (date, task.name, occurrence)
+                    if key not in task_index:
+                        task_index[key] = len(tasks)
+                        tasks.append(task)
+                    holders[task_index[key]] = holder
+            encoded.append(holders)
+        assignments = np.full((len(tasks), len(schedulers)), -1, dtype=np.intp)
+        for candidate, holders in enumerate(encoded):
+            for task, holder in holders.items():
+                assignments[task, candidate] = holder
+        return cls(people, tasks, preference_weight=preference_weight), assignments
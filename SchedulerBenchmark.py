@@ -0,0 +1,209 @@
+import argparse
+import contextlib
+import json
+import platform
+import random
+import time
+import tracemalloc
+from collections import Counter
+from datetime import date, timedelta
+from typing import List, Dict, Tuple
+
+from NewScheduler import Scheduler, SchedulerStats, Person, Physicist, AbstractTask, Task, Day, Preference, \
+    DateTimeClass, RELAXATIONS, get_tasks_sorted_by_performability
+
+# (weeks, people) for each size preset
+PRESETS: Dict[str, Tuple[int, int]] = {
+    'week': (1, 10),
+    'month': (4, 25),
+    'quarter': (13, 50),
+    'half': (26, 100),
+    'year': (52, 200),
+}
+
+# Person methods that make up the constraint checks, counted while a benchmark runs
+CHECKS = ('can_perform_task', 'fits_day', 'avoid_weight', 'is_capable_of')
+
+
+def abstract_tasks() -> Dict[str, AbstractTask]:
+    """The task definitions used by NewScheduler.main()."""
+    return {
+        'POD': AbstractTask("POD", 4.5, location='UNC', requires=["HDR_AMP", "IORTTx"]),
+        'SAD': AbstractTask("SAD", 3.0, location=None),
+        'SAD_Assist': AbstractTask("SAD_Assist", 2.0, location=None),
+        'Gamma_Tile': AbstractTask("Gamma_Tile", 3.0, location="UNC"),
+        'Prostate_Brachy': AbstractTask("Prostate_Brachy", 3.0, location='UNC', compatible_with=['SAD', 'SAD_Assist']),
+        'HBO': AbstractTask("HBO", 2.0, compatible_with=["SAD_Assist", "SAD"], location='HBO'),
+        'POD_Backup': AbstractTask("POD_Backup", 2.0, requires=["SAD_Assist", "HDR_AMP", "IORTTx", "Prostate_Brachy"],
+                                   location='UNC'),
+        'HDR_AMP': AbstractTask("HDR_AMP", 1.0, compatible_with=["POD", "POD_Backup"], location='UNC'),
+        'IORTTx': AbstractTask("IORTTx", 2.0, compatible_with=["POD", "POD_Backup"], location='UNC'),
+    }
+
+
+class RosterGenerator:
+    """
+    Seeded synthetic rosters shaped like the main() week: Physicists with an occasional Gamma_Tile or
+    Prostate_Brachy capability, scattered Vacation/Dev/task requests and HBO/UNC avoid preferences, and one block
+    of the everyday POD/POD/HBO/POD_Backup/SAD tasks per nine people with the specialty tasks sprinkled on top.
+    """
+    def __init__(self, seed: int = 0, start: date = date(2024, 8, 26)):
+        self.seed = seed
+        self.start = start - timedelta(days=start.weekday())
+
+    def dates(self, weeks: int) -> List[DateTimeClass]:
+        dates = []
+        for week in range(weeks):
+            for weekday in range(5):
+                k = self.start + timedelta(days=7 * week + weekday)
+                dates.append(DateTimeClass(k.year, k.month, k.day))
+        return dates
+
+    def people(self, count: int, dates: List[DateTimeClass], rng: random.Random) -> List[Person]:
+        people = []
+        for i in range(count):
+            preferences, avoid_preferences = [], []
+            for day in dates:
+                draw = rng.random()
+                if draw < 0.04:
+                    preferences.append(Preference(day, "Vacation", weight=9.0))
+                elif draw < 0.06:
+                    preferences.append(Preference(day, "Dev", weight=7.0))
+                elif draw < 0.09:
+                    preferences.append(Preference(day, rng.choice(["POD", "POD_Backup", "SAD", "HBO"]),
+                                                  weight=float(rng.randint(1, 7))))
+                elif draw < 0.15:
+                    avoid_preferences.append(Preference(day, rng.choice(["HBO", "UNC"]),
+                                                        weight=float(rng.choice([1, 1, 3, 9]))))
+            performable_tasks = []
+            if rng.random() < 0.25:
+                performable_tasks.append(AbstractTask("Gamma_Tile", 0.0, location='UNC'))
+            if rng.random() < 0.25:
+                performable_tasks.append(AbstractTask('Prostate_Brachy', weight=0.0, location='UNC'))
+            people.append(Physicist(f"Physicist{i:03d}", weight_per_day=rng.choice([12 / 5, 18 / 5]),
+                                    preferences=preferences, avoid_preferences=avoid_preferences,
+                                    performable_tasks=performable_tasks))
+        return people
+
+    def days(self, dates: List[DateTimeClass], people: int, rng: random.Random) -> List[Day]:
+        tasks = abstract_tasks()
+        every_day = [tasks[name] for name in ("POD", "POD", "HBO", "POD_Backup", "SAD")]
+        specialties = [(tasks["HDR_AMP"], 0.6), (tasks["IORTTx"], 0.2), (tasks["Gamma_Tile"], 0.3),
+                       (tasks["Prostate_Brachy"], 0.2), (tasks["SAD_Assist"], 0.3)]
+        days = []
+        for day in dates:
+            day_tasks = []
+            for _ in range(max(1, people // 9)):
+                day_tasks += [Task(task, day) for task in every_day]
+                day_tasks += [Task(task, day) for task, chance in specialties if rng.random() < chance]
+            days.append(Day(date.fromordinal(day.ordinal).strftime("%A"), day_tasks, day))
+        return days
+
+    def scheduler(self, weeks: int, people: int, relaxation: str = 'restart') -> Scheduler:
+        rng = random.Random(self.seed)
+        dates = self.dates(weeks)
+        scheduler = Scheduler(relaxation=relaxation)
+        for person in self.people(people, dates, rng):
+            scheduler.add_person(person)
+        for day in self.days(dates, people, rng):
+            scheduler.add_day(day)
+        return scheduler
+
+
+@contextlib.contextmanager
+def count_checks(counter: Counter):
+    """Count calls to the Person constraint checks for the duration of the block."""
+    originals = {name: getattr(Person, name) for name in CHECKS}
+
+    def counting(name, method):
+        def wrapper(*args, **kwargs):
+            counter[name] += 1
+            return method(*args, **kwargs)
+        return wrapper
+
+    for name, method in originals.items():
+        setattr(Person, name, counting(name, method))
+    try:
+        yield counter
+    finally:
+        for name, method in originals.items():
+            setattr(Person, name, method)
+
+
+def run_preset(name: str, seed: int = 0, measure_memory: bool = True, relaxation: str = 'restart') -> Dict:
+    weeks, people = PRESETS[name]
+    generator = RosterGenerator(seed)
+    timings = {}
+
+    scheduler = generator.scheduler(weeks, people)
+    task_count = sum(len(day.tasks) for day in scheduler.days)
+    start = time.perf_counter()
+    get_tasks_sorted_by_performability(scheduler.days, scheduler.people)
+    timings['performability_sort'] = time.perf_counter() - start
+
+    scheduler = generator.scheduler(weeks, people)
+    start = time.perf_counter()
+    scheduler.fulfill_requests()
+    timings['fulfill_requests'] = time.perf_counter() - start
+
+    scheduler = generator.scheduler(weeks, people, relaxation)
+    scheduler.stats = SchedulerStats()
+    calls = Counter()
+    with count_checks(calls):
+        start = time.perf_counter()
+        scheduler.create_schedule()
+        timings['create_schedule'] = time.perf_counter() - start
+
+    result = {
+        'preset': name,
+        'seed': seed,
+        'relaxation': relaxation,
+        'weeks': weeks,
+        'people': people,
+        'days': len(scheduler.days),
+        'tasks': task_count,
+        'unassigned_tasks': sum(len(day.tasks) for day in scheduler.days),
+        'final_request_weight': scheduler.request_weight,
+        'seconds': timings,
+        'calls': {name: calls[name] for name in CHECKS},
+        'stats': scheduler.stats.as_dict(),
+    }
+
+    if measure_memory:
+        # A separate run, tracemalloc slows everything down too much to time under it
+        scheduler = generator.scheduler(weeks, people, relaxation)
+        tracemalloc.start()
+        scheduler.create_schedule()
+        result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the scheduler on seeded synthetic rosters.")
+    parser.add_argument('--preset', nargs='+', choices=list(PRESETS), default=['week', 'month', 'quarter'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--relaxation', choices=RELAXATIONS, default='restart')
+    parser.add_argument('--output', default='bench_output.json')
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc peak memory run")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.preset:
+        result = run_preset(name, seed=args.seed, measure_memory=not args.no_memory, relaxation=args.relaxation)
+        print(f"{name}: {result['tasks']} tasks, {result['people']} people, "
+              f"create_schedule {result['seconds']['create_schedule']:.3f}s, "
+              f"{result['unassigned_tasks']} unassigned")
+        results.append(result)
+
+    report = {
+        'python': platform.python_version(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
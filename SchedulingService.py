@@ -0,0 +1,440 @@
+import argparse
+import asyncio
+import copy
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import List, Optional, Dict, Tuple, AsyncIterator
+
+from NewScheduler import Scheduler, Person, Physicist, AbstractTask, Task, Day, Preference, DateTimeClass, \
+    RELAXATIONS
+from Rescheduling import ScheduleDelta, ScheduleChange, PersonUnavailable, PersonAvailable, TaskAdded, \
+    TaskRemoved, PreferenceChanged, reschedule
+
+
+# The solved scheduler every worker process answers what-if queries against, set by load_base
+_base: Optional[Scheduler] = None
+
+
+def load_base(scheduler: Optional[Scheduler]):
+    global _base
+    _base = scheduler
+
+
+def parse_date(value: str) -> DateTimeClass:
+    """Dates are ISO formatted, 2024-08-26."""
+    k = date.fromisoformat(value)
+    return DateTimeClass(k.year, k.month, k.day)
+
+
+def format_date(value: DateTimeClass) -> str:
+    return date.fromordinal(value.ordinal).isoformat()
+
+
+def roster_from_dict(data: Dict) -> Scheduler:
+    """
+    Build an unsolved Scheduler from a roster:
+
+        {"relaxation": "restart",
+         "tasks": {"POD": {"weight": 4.5, "location": "UNC", "requires": [...], "compatible_with": [...]}, ...},
+         "people": [{"name": "Leith", "weight_per_day": 2.4, "kind": "Physicist", "performable_tasks": ["Gamma_Tile"],
+                     "preferences": [["2024-08-26", "POD", 7.0]], "avoid_preferences": [["2024-08-27", "HBO", 3.0]]}],
+         "days": [{"name": "Monday", "date": "2024-08-26", "tasks": ["POD", "POD", "HBO", ...]}]}
+
+    kind defaults to Physicist, which adds the Physicist tasks to performable_tasks.
+    """
+    tasks = {name: AbstractTask(name, float(spec.get('weight', 0.0)), compatible_with=spec.get('compatible_with'),
+                                requires=spec.get('requires'), location=spec.get('location'))
+             for name, spec in data.get('tasks', {}).items()}
+    scheduler = Scheduler(relaxation=data.get('relaxation', 'restart'))
+    for spec in data.get('people', []):
+        preferences = [Preference(parse_date(d), target, weight=float(weight))
+                       for d, target, weight in spec.get('preferences', [])]
+        avoid_preferences = [Preference(parse_date(d), target, weight=float(weight))
+                             for d, target, weight in spec.get('avoid_preferences', [])]
+        performable_tasks = [AbstractTask(name, 0.0, location=tasks[name].location if name in tasks else None)
+                             for name in spec.get('performable_tasks', [])]
+        kind = Physicist if spec.get('kind', 'Physicist') == 'Physicist' else Person
+        scheduler.add_person(kind(spec['name'], float(spec['weight_per_day']), preferences=preferences,
+                                  avoid_preferences=avoid_preferences, performable_tasks=performable_tasks))
+    for spec in data.get('days', []):
+        day_date = parse_date(spec['date'])
+        name = spec.get('name', date.fromordinal(day_date.ordinal).strftime("%A"))
+        scheduler.add_day(Day(name, [Task(tasks[task_name], day_date) for task_name in spec.get('tasks', [])],
+                              day_date))
+    return scheduler
+
+
+def find_person(scheduler: Scheduler, name: str) -> Person:
+    for person in scheduler.people:
+        if person.name == name:
+            return person
+    raise KeyError(f"Unknown person {name!r}")
+
+
+def find_task(scheduler: Scheduler, name: str, day_date: DateTimeClass) -> Task:
+    """An open task with this name on the date, otherwise a scheduled one."""
+    day = scheduler.get_day(day_date)
+    task = day.first_open(name) if day else None
+    if task is None:
+        task = next((t for _, t in scheduler.schedule.get(day_date, []) if t.name == name), None)
+    if task is None:
+        raise KeyError(f"No {name} task on {day_date}")
+    return task
+
+
+def delta_from_dict(scheduler: Scheduler, data: Dict) -> ScheduleDelta:
+    """
+    Resolve a JSON delta against a scheduler:
+
+        {"type": "unavailable", "person": "Dance", "date": "2024-08-30", "weight": 9.0}
+        {"type": "available", "person": "Adria", "date": "2024-08-26"}
+        {"type": "add_task", "task": "HDR_AMP", "date": "2024-08-28", "weight": 1.0, "location": "UNC", ...}
+        {"type": "remove_task", "task": "IORTTx", "date": "2024-08-27"}
+        {"type": "preference", "person": "Jun", "date": "2024-08-28", "target": "HBO", "weight": 3.0,
+         "avoid": true, "removed": false}
+
+    add_task reuses the definition of a task with that name already in the roster when there is one.
+    """
+    kind = data['type']
+    day_date = parse_date(data['date'])
+    if kind == 'unavailable':
+        return PersonUnavailable(find_person(scheduler, data['person']), day_date,
+                                 weight=float(data.get('weight', 9.0)))
+    if kind == 'available':
+        return PersonAvailable(find_person(scheduler, data['person']), day_date)
+    if kind == 'add_task':
+        known = next((task.abstract_task for day in scheduler.days for task in day.tasks
+                      if task.name == data['task']), None)
+        if known is None:
+            known = next((task.abstract_task for entries in scheduler.schedule.values() for _, task in entries
+                          if task.name == data['task']), None)
+        if known is None or any(key in data for key in ('weight', 'location', 'requires', 'compatible_with')):
+            known = AbstractTask(data['task'], float(data.get('weight', 0.0)),
+                                 compatible_with=data.get('compatible_with'), requires=data.get('requires'),
+                                 location=data.get('location'))
+        return TaskAdded(Task(known, day_date))
+    if kind == 'remove_task':
+        return TaskRemoved(find_task(scheduler, data['task'], day_date))
+    if kind == 'preference':
+        person = find_person(scheduler, data['person'])
+        avoid = bool(data.get('avoid', False))
+        removed = bool(data.get('removed', False))
+        if removed:
+            existing = person.avoid_preferences_on(day_date) if avoid else person.preferences_on(day_date)
+            preference = next((p for p in existing if p.task_or_location == data['target']), None)
+            if preference is None:
+                raise KeyError(f"{person.name} has no preference for {data['target']} on {day_date}")
+        else:
+            preference = Preference(day_date, data['target'], weight=float(data.get('weight', 0.0)))
+        return PreferenceChanged(person, preference, avoid=avoid, removed=removed)
+    raise ValueError(f"Unknown delta type {kind!r}")
+
+
+def schedule_to_dict(scheduler: Scheduler) -> Dict:
+    return {
+        'schedule': {format_date(d): [[person.name, task.name] for person, task in entries]
+                     for d, entries in scheduler.schedule.items()},
+        'request_weight': scheduler.request_weight,
+        'unassigned': [[format_date(day.date), task.name] for day in scheduler.days for task in day.tasks],
+    }
+
+
+def change_to_dict(change: ScheduleChange) -> Dict:
+    return {
+        'date': format_date(change.date),
+        'task': change.task.name,
+        'before': change.before.name if change.before else None,
+        'after': change.after.name if change.after else None,
+    }
+
+
+def solve_roster(roster: Dict) -> Scheduler:
+    scheduler = roster_from_dict(roster)
+    scheduler.create_schedule()
+    return scheduler
+
+
+def solve_what_if(deltas: List[Dict]) -> Dict:
+    """Apply a scenario's deltas to a copy of this worker's solved roster and repair it."""
+    if _base is None:
+        raise RuntimeError("No roster loaded")
+    scheduler = copy.deepcopy(_base)
+    _, changes = reschedule(scheduler, [delta_from_dict(scheduler, delta) for delta in deltas])
+    result = schedule_to_dict(scheduler)
+    result['changes'] = [change_to_dict(change) for change in changes]
+    return result
+
+
+class SchedulingService:
+    """
+    Keeps a solved roster warm and answers what-if queries against it on a process pool. The solved scheduler is
+    sent to each worker once, when the pool starts, so a query only carries its deltas. Loading a new roster swaps
+    in a fresh pool; queries already running finish against the roster they were sent with, and load responds
+    once they have and the old pool is shut down.
+
+    The protocol is JSON lines. A request is {"id": ..., "method": ..., "params": {...}} and every response carries
+    the request's id. Requests are handled concurrently, so responses may come back in any order.
+
+        load      params: a roster (see roster_from_dict). Solves it and keeps it warm. Result: the schedule.
+        schedule  The schedule of the loaded roster.
+        what_if   params: {"scenarios": [[delta, ...], ...]} (see delta_from_dict). Each scenario is applied to a
+                  copy of the solved roster and repaired with Rescheduling. A response per scenario is streamed as
+                  soon as it is solved, {"id", "scenario", "result"}, followed by {"id", "done": true}.
+        shutdown  Stop the service.
+
+    Failures come back as {"id", "error": message}.
+    """
+    base: Optional[Scheduler]
+    pool: ProcessPoolExecutor
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.base = None
+        self.pool = self.start_pool(None)
+        self.write_lock = asyncio.Lock()
+        self.stopped = asyncio.Event()
+
+    def start_pool(self, base: Optional[Scheduler]) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.max_workers, initializer=load_base, initargs=(base,))
+
+    def close(self):
+        # Waiting lets the pool's management thread finish before the interpreter exits and closes its pipes
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+    async def run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.pool, function, *args)
+
+    async def load(self, roster: Dict) -> Dict:
+        if roster.get('relaxation', 'restart') not in RELAXATIONS:
+            raise ValueError(f"relaxation must be one of {RELAXATIONS}")
+        base = await self.run(solve_roster, roster)
+        old_pool, self.pool = self.pool, self.start_pool(base)
+        self.base = base
+        # Shut the replaced pool down fully, off the event loop so other requests carry on meanwhile
+        await asyncio.get_running_loop().run_in_executor(None, old_pool.shutdown)
+        return schedule_to_dict(base)
+
+    def schedule(self) -> Dict:
+        if self.base is None:
+            raise RuntimeError("No roster loaded")
+        return schedule_to_dict(self.base)
+
+    async def what_if(self, scenarios: List[List[Dict]]) -> AsyncIterator[Tuple[int, Dict]]:
+        """Yield (scenario index, result) as each scenario is solved."""
+        if self.base is None:
+            raise RuntimeError("No roster loaded")
+        loop = asyncio.get_running_loop()
+        pending = {loop.run_in_executor(self.pool, solve_what_if, deltas): i for i, deltas in enumerate(scenarios)}
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    try:
+                        yield index, {'result': future.result()}
+                    except Exception as e:
+                        yield index, {'error': f"{type(e).__name__}: {e}"}
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def send(self, writer: asyncio.StreamWriter, message: Dict):
+        async with self.write_lock:
+            writer.write(json.dumps(message).encode() + b"\n")
+            await writer.drain()
+
+    async def handle_request(self, request: Dict, writer: asyncio.StreamWriter):
+        request_id = request.get('id')
+        method = request.get('method')
+        params = request.get('params') or {}
+        try:
+            if method == 'load':
+                await self.send(writer, {'id': request_id, 'result': await self.load(params)})
+            elif method == 'schedule':
+                await self.send(writer, {'id': request_id, 'result': self.schedule()})
+            elif method == 'what_if':
+                async for index, outcome in self.what_if(params.get('scenarios', [])):
+                    await self.send(writer, {'id': request_id, 'scenario': index, **outcome})
+                await self.send(writer, {'id': request_id, 'done': True})
+            elif method == 'shutdown':
+                await self.send(writer, {'id': request_id, 'result': 'bye'})
+                self.stopped.set()
+            else:
+                raise ValueError(f"Unknown method {method!r}")
+        except Exception as e:
+            await self.send(writer, {'id': request_id, 'error': f"{type(e).__name__}: {e}"})
+
+    async def serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Read requests line by line from one connection, handling each as its own task."""
+        tasks = set()
+        try:
+            while True:
+                line = await self.next_line(reader)
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as e:
+                    await self.send(writer, {'id': None, 'error': f"JSONDecodeError: {e}"})
+                    continue
+                task = asyncio.create_task(self.handle_request(request, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            writer.close()
+
+    async def next_line(self, reader: asyncio.StreamReader) -> bytes:
+        """The next request line, or b"" once the connection ends or the service is shut down."""
+        if self.stopped.is_set():
+            return b""
+        read = asyncio.ensure_future(reader.readline())
+        stop = asyncio.ensure_future(self.stopped.wait())
+        await asyncio.wait({read, stop}, return_when=asyncio.FIRST_COMPLETED)
+        stop.cancel()
+        if not read.done():
+            read.cancel()
+            return b""
+        return read.result()
+
+
+async def stdio_streams(limit: int = 2 ** 26) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=limit)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+    writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+    return reader, writer
+
+
+async def serve_stdio(max_workers: Optional[int] = None):
+    service = SchedulingService(max_workers)
+    try:
+        reader, writer = await stdio_streams()
+        await service.serve(reader, writer)
+    finally:
+        service.close()
+
+
+async def serve_tcp(port: int, host: str = '127.0.0.1', max_workers: Optional[int] = None):
+    service = SchedulingService(max_workers)
+    server = await asyncio.start_server(service.serve, host, port, limit=2 ** 26)
+    try:
+        async with server:
+            await service.stopped.wait()
+    finally:
+        service.close()
+
+
+class SchedulingClient:
+    """
+    Local client that starts the service as a child process and talks to it over its stdin/stdout.
+
+        async with SchedulingClient() as client:
+            await client.request('load', roster)
+            async for index, result in client.what_if([[{"type": "unavailable", ...}]]):
+                ...
+    """
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.next_id = 0
+        self.queues: Dict[int, asyncio.Queue] = {}
+        self.reader_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        args = [sys.executable, os.path.abspath(__file__)]
+        if self.max_workers:
+            args += ['--workers', str(self.max_workers)]
+        self.process = await asyncio.create_subprocess_exec(*args, stdin=asyncio.subprocess.PIPE,
+                                                            stdout=asyncio.subprocess.PIPE, limit=2 ** 26)
+        self.reader_task = asyncio.create_task(self.read_responses())
+
+    async def read_responses(self):
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                break
+            message = json.loads(line)
+            queue = self.queues.get(message.get('id'))
+            if queue is not None:
+                queue.put_nowait(message)
+        for queue in self.queues.values():
+            queue.put_nowait({'error': 'service exited'})
+
+    async def send(self, method: str, params: Optional[Dict] = None) -> Tuple[int, asyncio.Queue]:
+        self.next_id += 1
+        request_id = self.next_id
+        queue = self.queues[request_id] = asyncio.Queue()
+        line = json.dumps({'id': request_id, 'method': method, 'params': params or {}})
+        self.process.stdin.write(line.encode() + b"\n")
+        await self.process.stdin.drain()
+        return request_id, queue
+
+    async def request(self, method: str, params: Optional[Dict] = None) -> Dict:
+        request_id, queue = await self.send(method, params)
+        try:
+            message = await queue.get()
+        finally:
+            self.queues.pop(request_id, None)
+        if 'error' in message:
+            raise RuntimeError(message['error'])
+        return message['result']
+
+    async def what_if(self, scenarios: List[List[Dict]]) -> AsyncIterator[Tuple[int, Dict]]:
+        """Yield (scenario index, result) as the service streams them back; a failed scenario yields {"error"}."""
+        request_id, queue = await self.send('what_if', {'scenarios': scenarios})
+        try:
+            while True:
+                message = await queue.get()
+                if message.get('done'):
+                    break
+                if 'scenario' not in message:
+                    raise RuntimeError(message.get('error'))
+                if 'error' in message:
+                    yield message['scenario'], {'error': message['error']}
+                else:
+                    yield message['scenario'], message['result']
+        finally:
+            self.queues.pop(request_id, None)
+
+    async def close(self):
+        if self.process is None:
+            return
+        if self.process.returncode is None:
+            try:
+                await self.request('shutdown')
+            except (RuntimeError, ConnectionError):
+                pass
+            self.process.stdin.close()
+            await self.process.wait()
+        if self.reader_task is not None:
+            await self.reader_task
+
+    async def __aenter__(self) -> 'SchedulingClient':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scheduling service speaking JSON lines over stdio or TCP.")
+    parser.add_argument('--port', type=int, default=None, help="serve on this localhost port instead of stdio")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    if args.port is not None:
+        asyncio.run(serve_tcp(args.port, max_workers=args.workers))
+    else:
+        asyncio.run(serve_stdio(max_workers=args.workers))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+from datetime import date, timedelta
+from itertools import count
+from typing import List, Optional, Dict, Iterable, Iterator, Union
+
+from NewScheduler import AbstractTask, Task, Day, Week, DateTimeClass
+
+WEEKDAYS = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+
+def as_date(value: Union[date, DateTimeClass]) -> date:
+    if isinstance(value, DateTimeClass):
+        return date.fromordinal(value.ordinal)
+    return value
+
+
+class WeeklyTemplate:
+    """
+    The tasks that recur every week, by weekday, with exceptions for particular dates. A rule lists the tasks of a
+    weekday; on top of it a date can be a holiday (no day at all), have one-off tasks added (a Gamma_Tile, an
+    IORTTx), have tasks removed by name, or be replaced outright. Nothing is built up front: days() and weeks()
+    are generators that only create a date's Day and Tasks when it is drawn, so an unbounded horizon can go
+    straight into Scheduler.stream_schedule and only the active week is ever in memory.
+
+        template = WeeklyTemplate({day: [pod, pod, hbo, pod_backup, sad] for day in WEEKDAYS[:5]})
+        template.add_tasks(date(2024, 8, 29), [gamma_tile])
+        template.add_holiday(date(2024, 9, 2))
+        for week, schedule in scheduler.stream_schedule(template.weeks(date(2024, 8, 26))):
+            ...
+    """
+    rules: Dict[int, List[AbstractTask]]
+    holidays: set
+    additions: Dict[date, List[AbstractTask]]
+    removals: Dict[date, List[str]]
+    replacements: Dict[date, List[AbstractTask]]
+
+    def __init__(self, rules: Optional[Dict[Union[int, str], List[AbstractTask]]] = None):
+        """rules maps a weekday, 0 for Monday or its name, to the tasks it always has. Other weekdays are off."""
+        self.rules = {}
+        self.holidays = set()
+        self.additions = {}
+        self.removals = {}
+        self.replacements = {}
+        for weekday, tasks in (rules or {}).items():
+            self.set_rule(weekday, tasks)
+
+    @staticmethod
+    def weekday(weekday: Union[int, str]) -> int:
+        return WEEKDAYS.index(weekday) if isinstance(weekday, str) else weekday
+
+    def set_rule(self, weekday: Union[int, str], tasks: List[AbstractTask]):
+        self.rules[self.weekday(weekday)] = list(tasks)
+
+    def add_holiday(self, day: Union[date, DateTimeClass]):
+        self.holidays.add(as_date(day))
+
+    def add_tasks(self, day: Union[date, DateTimeClass], tasks: List[AbstractTask]):
+        self.additions.setdefault(as_date(day), []).extend(tasks)
+
+    def remove_tasks(self, day: Union[date, DateTimeClass], names: List[str]):
+        """Drop one of the date's tasks per name given."""
+        self.removals.setdefault(as_date(day), []).extend(names)
+
+    def replace_day(self, day: Union[date, DateTimeClass], tasks: List[AbstractTask]):
+        """Give the date exactly these tasks instead of its weekday's, even on a weekday with no rule."""
+        self.replacements[as_date(day)] = list(tasks)
+
+    def tasks_on(self, day: Union[date, DateTimeClass]) -> Optional[List[AbstractTask]]:
+        """The date's tasks with every exception applied, None if it is not a working day."""
+        day = as_date(day)
+        if day in self.holidays:
+            return None
+        tasks = self.replacements.get(day)
+        if tasks is None:
+            tasks = self.rules.get(day.weekday())
+            if tasks is None and day not in self.additions:
+                return None
+        tasks = list(tasks or []) + self.additions.get(day, [])
+        for name in self.removals.get(day, []):
+            index = next((i for i, task in enumerate(tasks) if task.name == name), None)
+            if index is not None:
+                del tasks[index]
+        return tasks
+
+    def day(self, day: Union[date, DateTimeClass]) -> Optional[Day]:
+        """A fresh Day for the date, None if it is not a working day."""
+        day = as_date(day)
+        tasks = self.tasks_on(day)
+        if tasks is None:
+            return None
+        day_date = DateTimeClass(day.year, day.month, day.day)
+        return Day(WEEKDAYS[day.weekday()], [Task(task, day_date) for task in tasks], day_date)
+
+    def last_day(self, stop: Optional[Union[date, DateTimeClass]]) -> Optional[date]:
+        """
+        stop as a date. Without one the horizon is unbounded, unless no weekday has a rule, when it ends after the
+        last exception so iterating it finishes.
+        """
+        if stop is not None:
+            return as_date(stop)
+        if self.rules:
+            return None
+        exceptions = set(self.additions) | set(self.replacements)
+        return max(exceptions) + timedelta(days=1) if exceptions else date.min
+
+    def days(self, start: Union[date, DateTimeClass], stop: Optional[Union[date, DateTimeClass]] = None) \
+            -> Iterator[Day]:
+        """Lazily yield the working days from start up to, not including, stop; without a stop it never ends."""
+        start = as_date(start)
+        stop = self.last_day(stop)
+        for offset in count():
+            current = start + timedelta(days=offset)
+            if stop is not None and current >= stop:
+                return
+            day = self.day(current)
+            if day is not None:
+                yield day
+
+    def weeks(self, start: Union[date, DateTimeClass], stop: Optional[Union[date, DateTimeClass]] = None) \
+            -> Iterator[Week]:
+        """
+        Lazily yield a Week per Monday-to-Sunday week from start's week up to stop, each named for its Monday as
+        in main(). Days before start and from stop on are left out; weeks with no working days are skipped.
+        """
+        start = as_date(start)
+        stop = self.last_day(stop)
+        monday = start - timedelta(days=start.weekday())
+        while stop is None or monday < stop:
+            week_stop = monday + timedelta(days=7)
+            days = list(self.days(max(monday, start), week_stop if stop is None else min(week_stop, stop)))
+            if days:
+                yield Week(DateTimeClass(monday.year, monday.month, monday.day).to_string(), days)
+            monday = week_stop
+
+    def expand(self, days: Iterable[Union[date, DateTimeClass]]) -> Iterator[Day]:
+        """Lazily yield a Day for each of the given dates that is a working day."""
+        for day in days:
+            built = self.day(day)
+            if built is not None:
+                yield built
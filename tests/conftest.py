@@ -0,0 +1,63 @@
+import os
+import sys
+from typing import Callable
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from NewScheduler import Scheduler, day_types, tasks_conflict  # noqa: E402
+from SchedulerBenchmark import RosterGenerator  # noqa: E402
+
+
+@pytest.fixture
+def roster() -> Callable[..., Scheduler]:
+    """A seeded synthetic roster, as the benchmark builds them."""
+    def build(seed: int = 0, weeks: int = 1, people: int = 9, relaxation: str = 'restart') -> Scheduler:
+        return RosterGenerator(seed).scheduler(weeks, people, relaxation)
+    return build
+
+
+def check_consistent(scheduler: Scheduler):
+    """The schedule, the people's day masks, the days' open tasks and the eligibility matrix all agree."""
+    held = {}
+    for date, entries in scheduler.schedule.items():
+        for person, task in entries:
+            held.setdefault((person.name, date), []).append(task)
+    for person in scheduler.people:
+        assert person.current_weight == pytest.approx(sum(task.weight for task in person._assignments))
+        for day in scheduler.days:
+            tasks = person.tasks_on(day.date)
+            assert sorted(map(id, tasks)) == sorted(map(id, held.get((person.name, day.date), [])))
+            assert person._day_types.get(day.date, 0) == day_types(tasks)
+            for i, task in enumerate(tasks):
+                for other in tasks[i + 1:]:
+                    assert not tasks_conflict(task, other), (person.name, day.date, task.name, other.name)
+    for day in scheduler.days:
+        assigned = {id(task) for entries in [scheduler.schedule.get(day.date, [])] for _, task in entries}
+        assert not any(id(task) in assigned for task in day.tasks)
+    eligibility = scheduler.eligibility
+    if eligibility is not None:
+        for day in scheduler.days:
+            for task in day.tasks:
+                column = eligibility.task_index[task]
+                for row, person in enumerate(eligibility.people):
+                    assert eligibility.capable[row, column] == person.is_capable_of(task)
+                    assert eligibility.available[row, column] == (person.is_capable_of(task) and
+                                                                  person.fits_day(task))
+                    assert eligibility.avoid[row, column] == person.avoid_weight(task)
+
+
+@pytest.fixture
+def consistent() -> Callable[[Scheduler], None]:
+    return check_consistent
+
+
+def schedule_names(schedule) -> dict:
+    return {date: [(person.name, task.name) for person, task in entries] for date, entries in schedule.items()}
+
+
+@pytest.fixture
+def names() -> Callable[[dict], dict]:
+    """A get_schedule/create_schedule result by name, to compare schedules built from different objects."""
+    return schedule_names
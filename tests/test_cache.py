@@ -0,0 +1,65 @@
+import os
+
+from ExactScheduler import ExactScheduler
+from ScheduleCache import ScheduleCache, scenario_key
+
+
+def test_replay_matches_a_fresh_solve(roster, names, consistent):
+    for relaxation in ('restart', 'day'):
+        cache = ScheduleCache()
+        cache.solve(roster(seed=4, weeks=2, people=12, relaxation=relaxation))
+        assert cache.misses == 1
+
+        replayed = roster(seed=4, weeks=2, people=12, relaxation=relaxation)
+        schedule = cache.solve(replayed)
+        assert cache.hits == 1
+
+        fresh = roster(seed=4, weeks=2, people=12, relaxation=relaxation)
+        assert names(schedule) == names(fresh.create_schedule())
+        assert replayed.request_weight == fresh.request_weight
+        assert replayed.day_weights == fresh.day_weights
+        assert [[task.name for task in day.tasks] for day in replayed.days] == \
+               [[task.name for task in day.tasks] for day in fresh.days]
+        assert [person.current_weight for person in replayed.people] == \
+               [person.current_weight for person in fresh.people]
+        consistent(replayed)
+
+
+def test_changed_inputs_miss(roster):
+    cache = ScheduleCache()
+    cache.solve(roster(seed=4))
+    changed = roster(seed=4)
+    changed.people[0].weight_per_day += 1.0
+    cache.solve(changed)
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_scheduler_class_is_part_of_the_key(roster):
+    source = roster(seed=1)
+    exact = ExactScheduler()
+    for person in source.people:
+        exact.add_person(person)
+    for day in source.days:
+        exact.add_day(day)
+    assert scenario_key(source) != scenario_key(exact)
+
+
+def test_directory_survives_the_process(roster, names, tmp_path):
+    schedule = ScheduleCache(directory=str(tmp_path)).solve(roster(seed=6))
+    assert [name for name in os.listdir(tmp_path) if not name.endswith('.json')] == []
+
+    cache = ScheduleCache(directory=str(tmp_path))
+    assert names(cache.solve(roster(seed=6))) == names(schedule)
+    assert cache.hits == 1
+
+
+def test_unreadable_file_is_a_miss(roster, names, tmp_path):
+    cache = ScheduleCache(directory=str(tmp_path))
+    key = scenario_key(roster(seed=6))
+    with open(cache.path(key), 'w') as f:
+        f.write('{"days": [')
+    assert cache.get(key) is None
+
+    schedule = cache.solve(roster(seed=6))
+    assert cache.misses == 1
+    assert names(ScheduleCache(directory=str(tmp_path)).solve(roster(seed=6))) == names(schedule)
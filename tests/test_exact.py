@@ -0,0 +1,86 @@
+import itertools
+import random
+
+from ExactScheduler import DaySearch, ExactScheduler
+from NewScheduler import Task, DateTimeClass, Physicist, tasks_conflict, REQUEST_WEIGHTS
+from SchedulerBenchmark import abstract_tasks
+
+
+def brute_force(tasks, domains, people: int) -> bool:
+    """Whether some choice of a person from each task's domain gives no one two conflicting tasks."""
+    choices = [[i for i in range(people) if domain >> i & 1] for domain in domains]
+    conflicts = [(i, j) for i, j in itertools.combinations(range(len(tasks)), 2) if tasks_conflict(tasks[i], tasks[j])]
+    return any(all(chosen[i] != chosen[j] for i, j in conflicts) for chosen in itertools.product(*choices))
+
+
+def check_solution(tasks, domains, people, solution):
+    index = {id(person): i for i, person in enumerate(people)}
+    chosen = [index[id(solution[task])] for task in tasks]
+    for task, domain, person in zip(tasks, domains, chosen):
+        assert domain >> person & 1
+    for i, j in itertools.combinations(range(len(tasks)), 2):
+        assert chosen[i] != chosen[j] or not tasks_conflict(tasks[i], tasks[j])
+
+
+def test_day_search_matches_brute_force():
+    rng = random.Random(0)
+    definitions = list(abstract_tasks().values())
+    date = DateTimeClass(2024, 8, 26)
+    people = [Physicist(f"P{i}", 12 / 5) for i in range(4)]
+    solved = unsolvable = 0
+    for _ in range(300):
+        tasks = [Task(rng.choice(definitions), date) for _ in range(rng.randint(1, 7))]
+        domains = [rng.randint(1, 2 ** len(people) - 1) for _ in tasks]
+        solution = DaySearch(tasks, people, domains).solve()
+        assert (solution is not None) == brute_force(tasks, domains, len(people))
+        if solution is None:
+            unsolvable += 1
+        else:
+            solved += 1
+            check_solution(tasks, domains, people, solution)
+    assert solved and unsolvable
+
+
+def exact_roster(roster, seed: int) -> ExactScheduler:
+    source = roster(seed=seed, weeks=1, people=5)
+    scheduler = ExactScheduler()
+    for person in source.people:
+        scheduler.add_person(person)
+    for day in source.days:
+        scheduler.add_day(day)
+    return scheduler
+
+
+def test_exact_days_match_brute_force(roster):
+    # Every day of small rosters at request weights 0, 4 and 8, from the state left by the request pass
+    checked = 0
+    for seed in range(4):
+        scheduler = exact_roster(roster, seed)
+        start = scheduler.prepare()
+        scheduler.build_eligibility()
+        for weight in REQUEST_WEIGHTS[::4]:
+            scheduler.rollback(start)
+            scheduler.build_task_queue()
+            scheduler.fulfill_requests(minimum_weight=weight)
+            people = scheduler.eligibility.people
+            for day in scheduler.days:
+                tasks = [task for task in day.tasks if task in scheduler.tasks_by_possibility]
+                if not tasks:
+                    continue
+                domains = [sum(1 << i for i, ok in enumerate(scheduler.eligibility.eligible_people(task, weight)) if ok)
+                           for task in tasks]
+                solution = scheduler.solve_day(day, tasks, weight)
+                assert (solution is not None) == brute_force(tasks, domains, len(people))
+                if solution is not None:
+                    check_solution(tasks, domains, people, solution)
+                checked += 1
+    assert checked
+
+
+def test_exact_schedule_is_consistent(roster, consistent):
+    for seed in range(4):
+        scheduler = exact_roster(roster, seed)
+        scheduler.create_schedule()
+        consistent(scheduler)
+        if not any(day.tasks for day in scheduler.days):
+            assert not scheduler.infeasible_days
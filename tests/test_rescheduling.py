@@ -0,0 +1,74 @@
+import pytest
+
+from NewScheduler import Task, Preference
+from Rescheduling import reschedule, PersonUnavailable, PersonAvailable, TaskAdded, TaskRemoved, PreferenceChanged, \
+    ScheduleDelta, AWAY_TASKS
+from SchedulerBenchmark import abstract_tasks
+
+
+def solved(roster, relaxation):
+    scheduler = roster(seed=2, weeks=2, people=12, relaxation=relaxation)
+    scheduler.create_schedule()
+    return scheduler
+
+
+def worker(scheduler, date):
+    """Someone holding a weighted task on the date."""
+    return next(person for person, task in scheduler.schedule[date] if task.weight > 0)
+
+
+def held_task(scheduler, date):
+    return next(task for _, task in scheduler.schedule[date] if task.weight > 0)
+
+
+DELTAS = {
+    'unavailable': lambda s, day: [PersonUnavailable(worker(s, day.date), day.date)],
+    'unavailable_twice': lambda s, day: [PersonUnavailable(worker(s, day.date), day.date),
+                                         PersonUnavailable(worker(s, day.date), day.date)],
+    'available': lambda s, day: [PersonAvailable(next(p for p, t in s.schedule[day.date] if t.name in AWAY_TASKS),
+                                                 day.date)],
+    'task_added': lambda s, day: [TaskAdded(Task(abstract_tasks()['HBO'], day.date))],
+    'task_removed': lambda s, day: [TaskRemoved(held_task(s, day.date))],
+    'preference': lambda s, day: [PreferenceChanged(worker(s, day.date), Preference(day.date, 'Dev', weight=7.0))],
+    'avoid': lambda s, day: [PreferenceChanged(worker(s, day.date), Preference(day.date, 'UNC', weight=9.0),
+                                               avoid=True)],
+}
+
+
+@pytest.mark.parametrize('relaxation', ['restart', 'day'])
+@pytest.mark.parametrize('delta', list(DELTAS))
+def test_delta_keeps_the_schedule_consistent(roster, consistent, relaxation, delta):
+    scheduler = solved(roster, relaxation)
+    day = next(day for day in scheduler.days
+               if any(task.name in AWAY_TASKS for _, task in scheduler.schedule.get(day.date, [])))
+    deltas = DELTAS[delta](scheduler, day)
+    schedule, changes = reschedule(scheduler, deltas)
+    consistent(scheduler)
+    assert set(schedule) == {day.to_string() for day in scheduler.days}
+    for change in changes:
+        assert change.before is not change.after
+
+
+def test_unavailable_swaps_out_a_different_away_task(roster, consistent):
+    scheduler = solved(roster, 'restart')
+    person, dev = next((person, task) for entries in scheduler.schedule.values() for person, task in entries
+                       if task.name == 'Dev')
+    day = scheduler.get_day(dev.date)
+    reschedule(scheduler, [PersonUnavailable(person, day.date)])
+    assert [task.name for task in person.tasks_on(day.date)] == ['Vacation']
+    assert dev not in day.tasks
+    consistent(scheduler)
+
+
+def test_heavy_avoid_preference_moves_the_task(roster, consistent):
+    scheduler = solved(roster, 'day')
+    date = scheduler.days[0].date
+    person, task = next((person, task) for person, task in scheduler.schedule[date] if task.location == 'UNC')
+    reschedule(scheduler, [PreferenceChanged(person, Preference(date, 'UNC', weight=9.0), avoid=True)])
+    assert all(held.location != 'UNC' for held in person.tasks_on(date))
+    consistent(scheduler)
+
+
+def test_schedule_delta_is_abstract():
+    with pytest.raises(TypeError):
+        ScheduleDelta()
@@ -0,0 +1,87 @@
+import pytest
+
+from ExactScheduler import ExactScheduler
+from LocalSearch import improve_schedule
+from NewScheduler import SchedulerStats
+
+
+def open_tasks(scheduler) -> int:
+    return sum(len(day.tasks) for day in scheduler.days)
+
+
+def trip_after(scheduler, calls: int):
+    """Make the scheduler's time budget run out at its calls'th check instead of on the clock."""
+    checks = [0]
+
+    def out_of_time():
+        if scheduler.deadline is None:
+            return False
+        checks[0] += 1
+        if checks[0] >= calls:
+            scheduler.timed_out = True
+        return scheduler.timed_out
+    scheduler.out_of_time = out_of_time
+
+
+@pytest.mark.parametrize('relaxation', ['restart', 'day'])
+def test_spent_budget_leaves_everything_open(roster, consistent, relaxation):
+    scheduler = roster(seed=1, weeks=2, people=9, relaxation=relaxation)
+    total = open_tasks(scheduler)
+    calls = []
+    schedule = scheduler.create_schedule(time_budget=0.0, progress=calls.append)
+    assert scheduler.timed_out
+    assert not any(schedule.values())
+    assert open_tasks(scheduler) == total
+    assert len(calls) == 1 and calls[0].timed_out and calls[0].remaining == total
+    consistent(scheduler)
+
+    # The matrix may never have been built; the local search builds it
+    improve_schedule(scheduler, time_budget=0.05, seed=0)
+    assert scheduler.eligibility is not None
+    consistent(scheduler)
+
+
+@pytest.mark.parametrize('relaxation', ['restart', 'day'])
+def test_generous_budget_changes_nothing(roster, names, relaxation):
+    unbounded = roster(seed=7, weeks=2, people=9, relaxation=relaxation)
+    bounded = roster(seed=7, weeks=2, people=9, relaxation=relaxation)
+    bounded.stats = SchedulerStats()
+    calls = []
+    assert names(bounded.create_schedule(time_budget=60.0, progress=calls.append)) == \
+           names(unbounded.create_schedule())
+    assert not bounded.timed_out and not bounded.stats.timed_out
+    assert len(calls) == bounded.stats.passes
+    assert not any(call.timed_out for call in calls)
+
+
+@pytest.mark.parametrize('relaxation', ['restart', 'day'])
+def test_budget_running_out_keeps_the_best_attempt(roster, consistent, relaxation):
+    tripped = 0
+    for seed in range(6):
+        for calls_allowed in range(2, 120, 9):
+            scheduler = roster(seed=seed, weeks=2, people=8, relaxation=relaxation)
+            trip_after(scheduler, calls_allowed)
+            calls = []
+            scheduler.create_schedule(time_budget=60.0, progress=calls.append)
+            consistent(scheduler)
+            assert calls
+            if scheduler.timed_out:
+                tripped += 1
+                assert calls[-1].timed_out
+                assert open_tasks(scheduler) == calls[-1].best_remaining
+    assert tripped
+
+
+def test_exact_search_stops_with_the_budget(roster, consistent):
+    for calls_allowed in (0, 5, 40):
+        source = roster(seed=3, weeks=1, people=6)
+        scheduler = ExactScheduler()
+        for person in source.people:
+            scheduler.add_person(person)
+        for day in source.days:
+            scheduler.add_day(day)
+        trip_after(scheduler, calls_allowed)
+        scheduler.create_schedule(time_budget=60.0)
+        assert scheduler.timed_out
+        assert not scheduler.infeasible_days
+        consistent(scheduler)
@@ -0,0 +1,71 @@
+from NewScheduler import Scheduler
+
+
+def state(scheduler: Scheduler, columns: int):
+    """Everything a pass changes, by object identity."""
+    return (
+        [(tuple(map(id, person._assignments)), person.current_weight,
+          {date: tuple(map(id, tasks)) for date, tasks in person._day_tasks.items()}, dict(person._day_types))
+         for person in scheduler.people],
+        [(tuple(map(id, day.tasks)), {name: tuple(map(id, tasks)) for name, tasks in day.open_by_name.items() if tasks})
+         for day in scheduler.days],
+        {date: [(id(person), id(task)) for person, task in entries] for date, entries in scheduler.schedule.items()},
+        sorted((id(task), key) for task, key in scheduler.tasks_by_possibility.ordered()),
+        scheduler.eligibility.available[:, :columns].tolist(),
+    )
+
+
+def start_pass(scheduler: Scheduler) -> int:
+    start = scheduler.prepare()
+    scheduler.build_eligibility()
+    scheduler.build_task_queue()
+    return start
+
+
+def test_rollback_restores_the_start_state(roster, consistent):
+    scheduler = roster(seed=3, weeks=2, people=12)
+    start = start_pass(scheduler)
+    columns = len(scheduler.eligibility.tasks)
+    before = state(scheduler, columns)
+
+    scheduler.fulfill_requests(minimum_weight=0.0)
+    scheduler.assign_remaining_tasks(0.0)
+    assert len(scheduler.trail) > start
+    assert state(scheduler, columns) != before
+
+    scheduler.rollback(start)
+    assert state(scheduler, columns) == before
+    assert not any(scheduler.schedule.values())
+    consistent(scheduler)
+
+
+def test_rollback_to_an_inner_checkpoint(roster, consistent):
+    scheduler = roster(seed=5, weeks=1, people=9)
+    start_pass(scheduler)
+    scheduler.fulfill_requests(minimum_weight=0.0)
+    middle = scheduler.checkpoint()
+    columns = len(scheduler.eligibility.tasks)
+    after_requests = state(scheduler, columns)
+
+    scheduler.assign_remaining_tasks(0.0)
+    scheduler.rollback(middle)
+    assert state(scheduler, columns) == after_requests
+    consistent(scheduler)
+
+
+def test_escalating_solve_matches_a_fresh_solve_at_the_final_weight(roster, names):
+    # A solve that has to escalate rolls back every failed pass, so its final pass starts from the same state as
+    # a fresh scheduler would
+    for seed in range(8):
+        scheduler = roster(seed=seed, weeks=1, people=8)
+        schedule = scheduler.create_schedule()
+        if scheduler.request_weight == 0.0:
+            continue
+        fresh = roster(seed=seed, weeks=1, people=8)
+        start = start_pass(fresh)
+        fresh.rollback(start)
+        fresh.fulfill_requests(minimum_weight=scheduler.request_weight)
+        fresh.assign_remaining_tasks(scheduler.request_weight)
+        assert names(schedule) == names(fresh.get_schedule())
+        return
+    raise AssertionError("no roster had to escalate")